@@ -0,0 +1,184 @@
+"""
+Replica-batched ensembles of the Boltzmann wealth model.
+
+Studying the wealth distribution takes many independent runs of the model.
+BoltzmannEnsemble evolves R replicas together, as an (R, N) wealth matrix
+and an (R, N, 2) position array: every replica has its own grid, which
+become disjoint ranges of cell ids, so that a step of all the replicas is a
+single step of VectorizedBoltzmannWealthModel's array operations. Each
+replica draws from its own random stream, spawned from the ensemble's seed,
+so that a replica's run does not depend on how many others run with it.
+
+The Python overhead of the model's agents and grid is gone, but each step
+still sorts all the agents (by turn, and by cell before and after moving),
+which bounds the gain: 500 replicas of 100 agents for 200 steps take about
+15-20 times less time than as many BoltzmannWealthModel runs (see
+run_ensemble.py), rather than orders of magnitude less.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+
+from .vectorized import MOORE_OFFSETS, draw_receivers, transfer
+
+# The uniforms of up to DRAW_STEPS steps are drawn at once, at most
+# DRAW_BUFFER_SIZE of them (16 MiB), so that drawing from each replica's
+# stream is not a Python call per replica per step.
+DRAW_STEPS = 32
+DRAW_BUFFER_SIZE = 2**21
+
+
+def gini_rows(counts):
+    """Return the Gini coefficient of each row of a (R, W) wealth histogram.
+
+    Row-wise version of WealthHistogram.gini.
+    """
+    wealths = np.arange(counts.shape[1])
+    n = counts.sum(axis=1)
+    total = (counts * wealths).sum(axis=1)
+    rank_end = np.cumsum(counts, axis=1)
+    rank_start = rank_end - counts
+    rank_sums = counts * rank_start + counts * (counts + 1) // 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gini = 2 * (wealths * rank_sums).sum(axis=1) / (n * total) - (n + 1) / n
+    return np.where((n > 0) & (total > 0), gini, 0.0)
+
+
+class BoltzmannEnsemble:
+    """
+    R independent replicas of the Boltzmann wealth model, stepped together.
+
+    Attributes:
+        wealth: (R, N) array of the agents' wealth in each replica.
+        pos: (R, N, 2) array of the agents' cells.
+        gini: List of the (R,) Gini coefficients of each step, from step 0.
+        wealth_counts: Counts of each wealth value over the agents of all the
+            replicas, summed over the steps since burn_in.
+    """
+
+    def __init__(self, replicas, N=100, width=10, height=10, seed=None, burn_in=0):
+        """
+        Args:
+            replicas: Number of replicas R.
+            N, width, height: Parameters of each replica, as for
+                BoltzmannWealthModel.
+            seed: Seed of the ensemble, from which the replicas' streams are
+                spawned.
+            burn_in: Step from which the wealth distribution is accumulated
+                into wealth_counts.
+        """
+        self.replicas = replicas
+        self.num_agents = N
+        self.width = width
+        self.height = height
+        self.burn_in = burn_in
+        self.rngs = [
+            np.random.default_rng(s)
+            for s in np.random.SeedSequence(seed).spawn(replicas)
+        ]
+        self.pos = np.stack(
+            [
+                np.stack([rng.integers(width, size=N), rng.integers(height, size=N)], 1)
+                for rng in self.rngs
+            ]
+        )
+        self.wealth = np.ones((replicas, N), dtype=np.int64)
+        self.uniforms = np.empty((replicas, 0, 3, N))
+        self.next_draws = 0
+        self.steps = 0
+        self.gini = []
+        self.wealth_counts = np.zeros(0, dtype=np.int64)
+        self.collect()
+
+    def cells(self):
+        """Return the (R, N) cell ids, distinct across replicas."""
+        replica = np.arange(self.replicas)[:, None]
+        cells_per_replica = self.width * self.height
+        return (
+            replica * cells_per_replica
+            + self.pos[..., 0] * self.height
+            + self.pos[..., 1]
+        )
+
+    def draw_uniforms(self):
+        """Draw the uniforms of the next steps, from each replica's stream.
+
+        A replica's stream is consumed in the same order whatever the number
+        of steps drawn at once, so the draws do not depend on it.
+        """
+        per_step = 3 * self.replicas * self.num_agents
+        steps = max(1, min(DRAW_STEPS, DRAW_BUFFER_SIZE // per_step))
+        self.uniforms = np.empty((self.replicas, steps, 3, self.num_agents))
+        for rng, block in zip(self.rngs, self.uniforms):
+            rng.random(out=block)
+        self.next_draws = 0
+
+    def step(self):
+        old_cells = self.cells()
+        # One block of uniform draws per replica, from its own stream, for the
+        # moves, the turns (a random permutation, as the ranks of iid draws)
+        # and the picks of cellmates.
+        if self.next_draws == self.uniforms.shape[1]:
+            self.draw_uniforms()
+        uniforms = self.uniforms[:, self.next_draws]
+        self.next_draws += 1
+        moves = (uniforms[:, 0] * 8).astype(np.int64)
+        turns = np.argsort(uniforms[:, 1], axis=1)
+        draws = uniforms[:, 2]
+
+        self.pos += MOORE_OFFSETS[moves]
+        self.pos %= (self.width, self.height)
+        wealth = self.wealth.ravel()
+        receivers = draw_receivers(
+            old_cells.ravel(),
+            self.cells().ravel(),
+            turns.ravel(),
+            draws.ravel(),
+            self.replicas * self.width * self.height,
+        )
+        transfer(wealth, receivers, turns.ravel())
+        self.steps += 1
+        self.collect()
+
+    def collect(self):
+        """Record the Gini coefficients, and accumulate the distribution."""
+        top = int(self.wealth.max()) + 1
+        rows = np.arange(self.replicas)[:, None] * top + self.wealth
+        counts = np.bincount(rows.ravel(), minlength=self.replicas * top)
+        counts = counts.reshape(self.replicas, top)
+        self.gini.append(gini_rows(counts))
+        if self.steps >= self.burn_in:
+            if top > len(self.wealth_counts):
+                self.wealth_counts = np.pad(
+                    self.wealth_counts, (0, top - len(self.wealth_counts))
+                )
+            self.wealth_counts[:top] += counts.sum(axis=0)
+
+    def run(self, steps):
+        for _ in range(steps):
+            self.step()
+
+    def gini_trajectories(self):
+        """Return the (R, steps + 1) Gini coefficient of each replica."""
+        return np.stack(self.gini, axis=1)
+
+    def stationary_distribution(self):
+        """Return the share of agents with each wealth, since burn_in."""
+        return self.wealth_counts / self.wealth_counts.sum()
+
+    def gini_bands(self, level=0.95):
+        """Return the Gini coefficient's mean and bands at each step.
+
+        Returns:
+            (mean, low, high, mean_low, mean_high): The mean over the
+            replicas, the central level interval of the replicas, and the
+            normal approximation level confidence interval of the mean.
+        """
+        trajectories = self.gini_trajectories()
+        mean = trajectories.mean(axis=0)
+        tail = (1 - level) / 2
+        low, high = np.quantile(trajectories, [tail, 1 - tail], axis=0)
+        z = NormalDist().inv_cdf(1 - tail)
+        se = trajectories.std(axis=0, ddof=1) / np.sqrt(self.replicas)
+        return mean, low, high, mean - z * se, mean + z * se
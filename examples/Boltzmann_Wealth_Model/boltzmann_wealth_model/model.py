@@ -1,12 +1,11 @@
 import mesa
 
+from .columns import ColumnarDataCollector
+from .wealth import WealthHistogram
+
 
 def compute_gini(model):
-    agent_wealths = [agent.wealth for agent in model.schedule.agents]
-    x = sorted(agent_wealths)
-    N = model.num_agents
-    B = sum(xi * (N - i) for i, xi in enumerate(x)) / (N * sum(x))
-    return 1 + (1 / N) - 2 * B
+    return model.wealth_histogram.gini()
 
 
 class BoltzmannWealthModel(mesa.Model):
@@ -21,7 +20,7 @@ class BoltzmannWealthModel(mesa.Model):
         self.num_agents = N
         self.grid = mesa.space.MultiGrid(width, height, True)
         self.schedule = mesa.time.RandomActivation(self)
-        self.datacollector = mesa.DataCollector(
+        self.datacollector = ColumnarDataCollector(
             model_reporters={"Gini": compute_gini}, agent_reporters={"Wealth": "wealth"}
         )
         # Create agents
@@ -33,6 +32,11 @@ class BoltzmannWealthModel(mesa.Model):
             y = self.random.randrange(self.grid.height)
             self.grid.place_agent(a, (x, y))
 
+        # Kept up to date by MoneyAgent.give_money, for compute_gini.
+        self.wealth_histogram = WealthHistogram(
+            [agent.wealth for agent in self.schedule.agents]
+        )
+
         self.running = True
         self.datacollector.collect(self)
 
@@ -64,7 +68,9 @@ class MoneyAgent(mesa.Agent):
         cellmates = self.model.grid.get_cell_list_contents([self.pos])
         if len(cellmates) > 1:
             other = self.random.choice(cellmates)
+            self.model.wealth_histogram.move(other.wealth, other.wealth + 1)
             other.wealth += 1
+            self.model.wealth_histogram.move(self.wealth, self.wealth - 1)
             self.wealth -= 1
 
     def step(self):
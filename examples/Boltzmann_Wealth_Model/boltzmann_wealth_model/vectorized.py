@@ -0,0 +1,189 @@
+"""
+Array-based Boltzmann wealth model.
+
+BoltzmannWealthModel activates its agents one at a time, and each of them
+queries the grid for its neighborhood and for its cellmates. Here the agents
+are only rows of a position and a wealth array, and a step is a few array
+operations over all of them:
+    - Every agent moves to one of its 8 neighboring cells, all drawn at once.
+    - The agents are given random turns, and sorted by (cell, turn) before
+      and after moving, so that the cellmates an agent would see on its turn
+      in BoltzmannWealthModel are contiguous, and a cellmate to give to is
+      drawn for every agent at once.
+    - Whether an agent actually gives on its turn only depends on whether it
+      had wealth at the start of the step or received some earlier in the
+      step, which is resolved for all the transfers together.
+This is the same stochastic process as BoltzmannWealthModel's, with random
+activation; only the random streams differ (see compare_engines.py).
+"""
+
+import mesa
+import numpy as np
+
+from .wealth import WealthHistogram
+
+# The 8 moves of a Moore neighborhood.
+MOORE_OFFSETS = np.array(
+    [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)]
+)
+
+
+def compute_gini(model):
+    return WealthHistogram(model.wealth).gini()
+
+
+def draw_receivers(old_cells, new_cells, turns, draws, num_cells):
+    """Draw the cellmate each agent would give to on its turn.
+
+    On its turn an agent has already moved, and its cellmates are the agents
+    which moved into its cell on earlier turns, those which have yet to move
+    out of it on later turns, and itself, as in BoltzmannWealthModel with
+    random activation.
+
+    Args:
+        old_cells, new_cells: Cell ids of the agents before and after moving.
+        turns: Each agent's turn; only compared between agents of a cell.
+        draws: Uniform draws in [0, 1), one per agent, to pick the cellmate.
+        num_cells: Number of cell ids.
+
+    Returns:
+        Array of each agent's receiver, or -1 if it is alone in its cell.
+    """
+    n = len(turns)
+    # Agents sorted by (cell, turn), before and after moving.
+    new_keys = new_cells * n + turns
+    new_order = np.argsort(new_keys)
+    old_keys = old_cells * n + turns
+    old_order = np.argsort(old_keys)
+    old_keys = old_keys[old_order]
+    old_ends = np.cumsum(np.bincount(old_cells, minlength=num_cells))
+    new_counts = np.bincount(new_cells, minlength=num_cells)
+    new_starts = np.cumsum(new_counts) - new_counts
+
+    # Agents which moved into the cell before: those before the agent in the
+    # new order.
+    moved_in_first = new_starts[new_cells]
+    moved_in = np.empty(n, dtype=np.int64)
+    moved_in[new_order] = np.arange(n)
+    moved_in -= moved_in_first
+    # Agents yet to move out of the cell: those after the agent's key in the
+    # old order. The keys are looked up in sorted order, which is much faster
+    # than at random.
+    staying_first = np.empty(n, dtype=np.int64)
+    staying_first[new_order] = np.searchsorted(
+        old_keys, new_keys[new_order], side="right"
+    )
+    staying = old_ends[new_cells] - staying_first
+
+    occupants = moved_in + staying + 1
+    picks = (draws * occupants).astype(np.int64)
+    receivers = np.where(
+        picks < moved_in,
+        new_order[np.minimum(moved_in_first + picks, n - 1)],
+        np.where(
+            picks < moved_in + staying,
+            old_order[np.minimum(staying_first + picks - moved_in, n - 1)],
+            np.arange(n),
+        ),
+    )
+    return np.where(occupants > 1, receivers, -1)
+
+
+def transfer(wealth, receivers, turns):
+    """Carry out, in place, the transfers of a step.
+
+    An agent gives if it has wealth at its turn: if it had some at the start
+    of the step, or it received some from an earlier turn. Starting from the
+    transfers of the former, the transfers they enable are added until no
+    more are.
+
+    Args:
+        wealth: Array of the agents' wealth, updated in place.
+        receivers: Each agent's receiver, as returned by draw_receivers.
+        turns: Each agent's turn.
+    """
+    n = len(wealth)
+    # Agents picking themselves, or alone in their cell, change nothing.
+    (givers,) = np.nonzero((receivers >= 0) & (receivers != np.arange(n)))
+    receivers = receivers[givers]
+    happened = wealth[givers] > 0
+    while True:
+        first_received = np.full(n, np.iinfo(np.int64).max)
+        np.minimum.at(first_received, receivers[happened], turns[givers[happened]])
+        enabled = ~happened & (first_received[givers] < turns[givers])
+        if not enabled.any():
+            break
+        happened |= enabled
+    wealth -= np.bincount(givers[happened], minlength=n)
+    wealth += np.bincount(receivers[happened], minlength=n)
+
+
+class VectorizedBoltzmannWealthModel(mesa.Model):
+    """A Boltzmann wealth model holding its agents in arrays.
+
+    Attributes:
+        pos: (N, 2) int array of the agents' cells, on a toroidal grid.
+        wealth: Array of the N agents' wealth.
+    """
+
+    def __init__(self, N=100, width=10, height=10, seed=None):
+        """
+        Args:
+            N, width, height: As for BoltzmannWealthModel.
+            seed: Seed of the model's RNG. It is used by mesa.Model.__new__,
+                which seeds self.random with it before __init__ runs; it is
+                only listed here so that the model accepts it.
+        """
+        self.num_agents = N
+        self.width = width
+        self.height = height
+        # NumPy stream seeded from the model's RNG, so that runs stay
+        # reproducible with the model seed.
+        self.rng = np.random.default_rng(self.random.getrandbits(64))
+        self.pos = np.stack(
+            [
+                self.rng.integers(width, size=N),
+                self.rng.integers(height, size=N),
+            ],
+            axis=1,
+        )
+        self.wealth = np.ones(N, dtype=np.int64)
+        self.datacollector = mesa.DataCollector(model_reporters={"Gini": compute_gini})
+        self.running = True
+        self.datacollector.collect(self)
+
+    def step(self):
+        old_cells = self.cells()
+        self.move()
+        self.give_money(old_cells)
+        # collect data
+        self.datacollector.collect(self)
+
+    def cells(self):
+        """Return the id of each agent's cell."""
+        return self.pos[:, 0] * self.height + self.pos[:, 1]
+
+    def move(self):
+        """Move every agent to a random neighboring cell."""
+        self.pos += MOORE_OFFSETS[self.rng.integers(8, size=self.num_agents)]
+        self.pos %= (self.width, self.height)
+
+    def give_money(self, old_cells):
+        """Carry out the transfers of a step, after the agents have moved.
+
+        Args:
+            old_cells: Cell ids of the agents before they moved.
+        """
+        turns = self.rng.permutation(self.num_agents)
+        receivers = draw_receivers(
+            old_cells,
+            self.cells(),
+            turns,
+            self.rng.random(self.num_agents),
+            self.width * self.height,
+        )
+        transfer(self.wealth, receivers, turns)
+
+    def run_model(self, n):
+        for i in range(n):
+            self.step()
@@ -0,0 +1,79 @@
+"""
+Statistical comparison of the agent-based and the array-based Boltzmann models.
+
+Runs independent replicates of BoltzmannWealthModel and of
+VectorizedBoltzmannWealthModel, and compares their Gini trajectories, the
+final Gini coefficient (with a Welch t-test), and the final wealth
+distribution pooled over the replicates.
+
+    $ python compare_engines.py --replicates 50 --steps 200
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from boltzmann_wealth_model.model import BoltzmannWealthModel
+from boltzmann_wealth_model.vectorized import VectorizedBoltzmannWealthModel
+
+
+def run_replicates(model_class, replicates, steps, **params):
+    """Return the (replicates, steps + 1) Gini, the final wealths and time."""
+    gini = np.zeros((replicates, steps + 1))
+    wealth = []
+    start = time.perf_counter()
+    for r in range(replicates):
+        model = model_class(**params)
+        model.run_model(steps)
+        gini[r] = model.datacollector.get_model_vars_dataframe()["Gini"]
+        if isinstance(model, VectorizedBoltzmannWealthModel):
+            wealth.append(model.wealth)
+        else:
+            wealth.append([agent.wealth for agent in model.schedule.agents])
+    return gini, np.concatenate(wealth), time.perf_counter() - start
+
+
+def welch_t(a, b):
+    """Welch's t statistic for the difference of the means of a and b."""
+    se = np.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b))
+    return (a.mean() - b.mean()) / se if se > 0 else 0.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--replicates", type=int, default=30)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--N", type=int, default=100)
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--height", type=int, default=10)
+    args = parser.parse_args()
+
+    params = dict(N=args.N, width=args.width, height=args.height)
+    agents = run_replicates(BoltzmannWealthModel, args.replicates, args.steps, **params)
+    arrays = run_replicates(
+        VectorizedBoltzmannWealthModel, args.replicates, args.steps, **params
+    )
+    print(f"Agent-based: {agents[2]:.2f}s, array-based: {arrays[2]:.2f}s")
+
+    final_agents, final_arrays = agents[0][:, -1], arrays[0][:, -1]
+    print(
+        f"Final Gini: agent-based {final_agents.mean():.3f}"
+        f" +/- {final_agents.std(ddof=1):.3f}"
+        f" | array-based {final_arrays.mean():.3f}"
+        f" +/- {final_arrays.std(ddof=1):.3f}"
+        f" | Welch t {welch_t(final_agents, final_arrays):.2f}"
+    )
+    gap = np.abs(agents[0].mean(axis=0) - arrays[0].mean(axis=0))
+    print(f"Largest gap between the mean Gini trajectories: {gap.max():.3f}")
+
+    top = max(agents[1].max(), arrays[1].max()) + 1
+    print("Final wealth distribution (share of agents):")
+    print(f"{'wealth':>8} {'agent-based':>12} {'array-based':>12}")
+    shares_agents = np.bincount(agents[1], minlength=top) / len(agents[1])
+    shares_arrays = np.bincount(arrays[1], minlength=top) / len(arrays[1])
+    for wealth in range(top):
+        print(
+            f"{wealth:>8} {shares_agents[wealth]:>12.3f}"
+            f" {shares_arrays[wealth]:>12.3f}"
+        )
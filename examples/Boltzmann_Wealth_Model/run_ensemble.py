@@ -0,0 +1,72 @@
+"""
+Runs a replica-batched ensemble of the Boltzmann wealth model.
+
+Evolves the replicas together with BoltzmannEnsemble, prints the stationary
+wealth distribution and the Gini coefficient's bands, and times the ensemble
+against running as many BoltzmannWealthModel instances one after the other.
+
+    $ python run_ensemble.py --replicas 1000 --steps 500 --burn-in 200
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from boltzmann_wealth_model.ensemble import BoltzmannEnsemble
+from boltzmann_wealth_model.model import BoltzmannWealthModel
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--replicas", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--burn-in", type=int, default=200)
+    parser.add_argument("--N", type=int, default=100)
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--loop-replicas",
+        type=int,
+        default=10,
+        help="Number of model instances to time, extrapolated to --replicas.",
+    )
+    parser.add_argument("--level", type=float, default=0.95)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ensemble = BoltzmannEnsemble(
+        args.replicas,
+        N=args.N,
+        width=args.width,
+        height=args.height,
+        seed=args.seed,
+        burn_in=args.burn_in,
+    )
+    ensemble.run(args.steps)
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.loop_replicas):
+        BoltzmannWealthModel(args.N, args.width, args.height).run_model(args.steps)
+    looped = (time.perf_counter() - start) * args.replicas / args.loop_replicas
+    print(
+        f"{args.replicas} replicas x {args.steps} steps: ensemble {batched:.2f}s,"
+        f" model instances {looped:.2f}s (estimated), {looped / batched:.0f}x"
+    )
+
+    print(
+        f"Stationary wealth distribution (share of agents, from step {args.burn_in}):"
+    )
+    for wealth, share in enumerate(ensemble.stationary_distribution()):
+        if share >= 1e-4:
+            print(f"{wealth:>8} {share:>8.4f}")
+
+    mean, low, high, mean_low, mean_high = ensemble.gini_bands(args.level)
+    print(f"Gini coefficient ({args.level:.0%} bands):")
+    print(f"{'step':>8} {'mean':>8} {'replicas':>17} {'mean CI':>17}")
+    for step in np.unique(np.linspace(0, args.steps, 11).astype(int)):
+        print(
+            f"{step:>8} {mean[step]:>8.3f} [{low[step]:.3f}, {high[step]:.3f}]"
+            f"  [{mean_low[step]:.3f}, {mean_high[step]:.3f}]"
+        )
@@ -11,6 +11,7 @@ Author of NetLogo code:
 
 import mesa
 
+from bank_reserves.ledger import AccountField, Ledger
 from bank_reserves.random_walk import RandomWalker
 
 
@@ -18,18 +19,27 @@ class Bank(mesa.Agent):
     def __init__(self, unique_id, model, reserve_percent=50):
         # initialize the parent class with required parameters
         super().__init__(unique_id, model)
-        # for tracking total value of loans outstanding
-        self.bank_loans = 0
+        # the accounts of the bank's customers, which keep track of the total
+        # value of deposits and of loans outstanding
+        self.ledger = Ledger()
         """percent of deposits the bank must keep in reserves - this is set via
            Slider in server.py"""
         self.reserve_percent = reserve_percent
-        # for tracking total value of deposits
-        self.deposits = 0
         # total amount of deposits in reserve
         self.reserves = (self.reserve_percent / 100) * self.deposits
         # amount the bank is currently able to loan
         self.bank_to_loan = 0
 
+    @property
+    def deposits(self):
+        # total value of deposits
+        return self.ledger.deposits
+
+    @property
+    def bank_loans(self):
+        # total value of loans outstanding
+        return self.ledger.bank_loans
+
     """update the bank's reserves and amount it can loan;
        this is called every time a person balances their books
        see below for Person.balance_books()"""
@@ -41,18 +51,25 @@ class Bank(mesa.Agent):
 
 # subclass of RandomWalker, which is subclass to Mesa Agent
 class Person(RandomWalker):
+    # the person's money is held in their account in the bank's ledger:
+    # the amount each person has in savings
+    savings = AccountField()
+    # total loan amount person has outstanding
+    loans = AccountField()
+    # money in the person's wallet
+    wallet = AccountField()
+    # savings minus loans, see balance_books() below
+    wealth = AccountField()
+
     def __init__(self, unique_id, pos, model, moore, bank, rich_threshold):
         # init parent class with required parameters
         super().__init__(unique_id, pos, model, moore=moore)
-        # the amount each person has in savings
-        self.savings = 0
-        # total loan amount person has outstanding
-        self.loans = 0
+        self.ledger = bank.ledger
         """start everyone off with a random amount in their wallet from 1 to a
            user settable rich threshold amount"""
-        self.wallet = self.random.randint(1, rich_threshold + 1)
-        # savings minus loans, see balance_books() below
-        self.wealth = 0
+        self.account = self.ledger.open_account(
+            wallet=self.random.randint(1, rich_threshold + 1)
+        )
         # person to trade with, see do_business() below
         self.customer = 0
         # person's bank, set at __init__, all people have the same bank in this model
@@ -135,40 +152,30 @@ class Person(RandomWalker):
 
     # part of balance_books()
     def deposit_to_savings(self, amount):
-        # take money from my wallet and put it in savings
-        self.wallet -= amount
-        self.savings += amount
-        # increase bank deposits
-        self.bank.deposits += amount
+        # take money from my wallet and put it in savings, which increases
+        # bank deposits
+        self.ledger.deposit(self.account, amount)
 
     # part of balance_books()
     def withdraw_from_savings(self, amount):
-        # put money in my wallet from savings
-        self.wallet += amount
-        self.savings -= amount
-        # decrease bank deposits
-        self.bank.deposits -= amount
+        # put money in my wallet from savings, which decreases bank deposits
+        self.ledger.withdraw(self.account, amount)
 
     # part of balance_books()
     def repay_a_loan(self, amount):
-        # take money from my wallet to pay off all or part of a loan
-        self.loans -= amount
-        self.wallet -= amount
+        """take money from my wallet to pay off all or part of a loan, which
+        decreases the bank's outstanding loans"""
+        self.ledger.repay(self.account, amount)
         # increase the amount the bank can loan right now
         self.bank.bank_to_loan += amount
-        # decrease the bank's outstanding loans
-        self.bank.bank_loans -= amount
 
     # part of balance_books()
     def take_out_loan(self, amount):
         """borrow from the bank to put money in my wallet, and increase my
-        outstanding loans"""
-        self.loans += amount
-        self.wallet += amount
+        outstanding loans, and the bank's"""
+        self.ledger.borrow(self.account, amount)
         # decresae the amount the bank can loan right now
         self.bank.bank_to_loan -= amount
-        # increase the bank's outstanding loans
-        self.bank.bank_loans += amount
 
     # step is called for each agent in model.BankReservesModel.schedule.step()
     def step(self):
@@ -0,0 +1,422 @@
+"""
+Parallel, streaming and resumable batch runs.
+
+mesa.batch_run keeps the rows of every run in memory until the whole sweep
+is over. run_batch instead runs the parameter combinations across a process
+pool, and hands each run's rows to a writer as soon as the run finishes, so
+that memory stays bounded by the runs in progress and the writer's buffers.
+The writer records which runs it has written, so that an interrupted sweep
+resumes where it stopped.
+
+CSVRunWriter appends the rows to a single CSV file. ColumnarRunWriter
+writes them as typed columns, partitioned by parameter combination, in a
+few files per partition, for load_runs() to read a few partitions or
+columns back.
+"""
+
+import csv
+import functools
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+
+import mesa
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    # ColumnarRunWriter falls back to .npz files
+    pa = pc = pq = None
+
+
+def parameter_combinations(parameters):
+    """Return the list of the kwargs of every combination of parameters.
+
+    As mesa.batch_run: each parameter is a single value or an iterable of
+    values (strings being single values).
+    """
+    values = []
+    for name, value in parameters.items():
+        if isinstance(value, str) or not hasattr(value, "__iter__"):
+            value = [value]
+        values.append([(name, v) for v in value])
+    return [dict(kwargs) for kwargs in itertools.product(*values)]
+
+
+def run_key(iteration, kwargs):
+    """Return the key identifying a run, for resuming."""
+    return json.dumps([iteration, kwargs], sort_keys=True, default=str)
+
+
+def _run(model_cls, run, max_steps, data_collection_period):
+    """Run one combination in a worker, return the run and its rows."""
+    run_id, iteration, kwargs = run
+    rows = mesa.batch_run(
+        model_cls,
+        # single values, so that mesa.batch_run does not iterate over them
+        {name: [value] for name, value in kwargs.items()},
+        number_processes=1,
+        data_collection_period=data_collection_period,
+        max_steps=max_steps,
+        display_progress=False,
+    )
+    for row in rows:
+        row["RunId"] = run_id
+        row["iteration"] = iteration
+    return run, rows
+
+
+def run_batch(
+    model_cls,
+    parameters,
+    writer,
+    processes=None,
+    iterations=1,
+    data_collection_period=-1,
+    max_steps=1000,
+    display_progress=True,
+):
+    """Batch run a model, writing the rows of each run as it finishes.
+
+    The runs and their rows are as with mesa.batch_run. Runs the writer has
+    already written are skipped, and the writer is flushed at the end, even
+    if the sweep is interrupted.
+
+    Args:
+        model_cls: The model class to batch run.
+        parameters: Dictionary of single values or iterables of values for
+            each model parameter.
+        writer: Writer of the runs' rows, e.g. a CSVRunWriter: with a done
+            set of run keys, and write(key, rows) and flush() methods.
+        processes: Number of worker processes, None for all the CPUs, 1 to
+            run in this process.
+        iterations: Number of runs of each combination.
+        data_collection_period: Number of steps between collected rows, -1
+            for the last step only.
+        max_steps: Maximum number of steps of a run.
+        display_progress: Display a progress bar.
+    """
+    combinations = parameter_combinations(parameters)
+    runs = [
+        (run_id, iteration, kwargs)
+        for run_id, (iteration, kwargs) in enumerate(
+            itertools.product(range(iterations), combinations)
+        )
+    ]
+    pending = [run for run in runs if run_key(run[1], run[2]) not in writer.done]
+    process_func = functools.partial(
+        _run,
+        model_cls,
+        max_steps=max_steps,
+        data_collection_period=data_collection_period,
+    )
+    with tqdm(
+        total=len(runs), initial=len(runs) - len(pending), disable=not display_progress
+    ) as pbar:
+        try:
+            if processes == 1:
+                results = map(process_func, pending)
+                for (_, iteration, kwargs), rows in results:
+                    writer.write(run_key(iteration, kwargs), rows)
+                    pbar.update()
+            else:
+                with multiprocessing.Pool(processes) as pool:
+                    results = pool.imap_unordered(process_func, pending)
+                    for (_, iteration, kwargs), rows in results:
+                        writer.write(run_key(iteration, kwargs), rows)
+                        pbar.update()
+        finally:
+            writer.flush()
+
+
+class CSVRunWriter:
+    """
+    Appends the rows of each run to a CSV file as it finishes.
+
+    Each run written is recorded, with the size of the CSV file after its
+    rows, in a log next to the file (path + ".runs"). Resuming, the runs in
+    the log are skipped, and the CSV file is truncated to the last run
+    recorded, dropping the rows of a run that was interrupted while written;
+    if the CSV file is missing, the log is reset and the sweep starts over.
+
+    Attributes:
+        done: Set of the keys of the runs written.
+    """
+
+    def __init__(self, path, resume=True):
+        """
+        Args:
+            path: Path of the CSV file.
+            resume: Whether to resume from the runs already written, or to
+                start over.
+        """
+        self.path = path
+        self.log_path = path + ".runs"
+        self.done = set()
+        self.fieldnames = None
+        # Without the CSV file, e.g. deleted or moved, start over too.
+        if not (resume and os.path.exists(self.log_path) and os.path.exists(path)):
+            open(path, "w").close()
+            open(self.log_path, "w").close()
+            return
+        size = 0
+        with open(self.log_path) as log:
+            for line in log:
+                entry = json.loads(line)
+                self.done.add(entry["run"])
+                size = entry["size"]
+        with open(path, "r+", newline="") as file:
+            file.truncate(size)
+            if size:
+                self.fieldnames = next(csv.reader(file))
+
+    def write(self, key, rows):
+        """Append the rows of a run, and record it.
+
+        Args:
+            key: Key of the run, see run_key().
+            rows: List of the run's rows, dictionaries of column values.
+        """
+        with open(self.path, "a", newline="") as file:
+            if rows:
+                if self.fieldnames is None:
+                    self.fieldnames = list(rows[0])
+                    csv.writer(file).writerow(self.fieldnames)
+                csv.DictWriter(file, self.fieldnames).writerows(rows)
+            file.flush()
+            os.fsync(file.fileno())
+            size = file.tell()
+        with open(self.log_path, "a") as log:
+            log.write(json.dumps({"run": key, "size": size}) + "\n")
+        self.done.add(key)
+
+    def flush(self):
+        """Nothing to write: the rows of each run are written as it finishes."""
+
+
+class ColumnarRunWriter:
+    """
+    Writes the rows of the runs as typed columns, partitioned by parameters.
+
+    The runs of each combination of the partition parameters go in a
+    directory root/name=value/..., which stores the combination once, in its
+    params.json, instead of on every row. The rows of a partition's runs are
+    buffered, and written together to a file of the partition once there are
+    rows_per_file of them, or when the writer is flushed: a Parquet file (a
+    single row group, with dictionary encoded columns) if pyarrow is
+    installed, or else a compressed .npz file. A file is written under a
+    temporary name and then renamed, so that it is either complete or absent,
+    and the runs in it are only then logged in root/runs.log, with the file,
+    for resuming: the runs still buffered when a sweep is interrupted are run
+    again, and a file written but not logged is removed.
+
+    Attributes:
+        done: Set of the keys of the runs written.
+    """
+
+    def __init__(
+        self,
+        root,
+        partition_by,
+        drop_columns=(),
+        resume=True,
+        file_format=None,
+        rows_per_file=100_000,
+        max_buffered_rows=1_000_000,
+    ):
+        """
+        Args:
+            root: Directory of the partitions.
+            partition_by: Names of the parameters to partition the runs by.
+            drop_columns: Names of columns not to store, e.g. columns
+                repeating the parameters.
+            resume: Whether to resume from the runs already written, or to
+                start over (removing root).
+            file_format: "parquet" or "npz", by default "parquet" if pyarrow
+                is installed.
+            rows_per_file: Number of rows from which a partition's buffered
+                runs are written to a file.
+            max_buffered_rows: Number of rows buffered over all the
+                partitions from which they are all written.
+        """
+        if file_format == "parquet" and pq is None:
+            raise ImportError("Writing Parquet files requires pyarrow.")
+        self.file_format = file_format or ("npz" if pq is None else "parquet")
+        self.root = root
+        self.partition_by = list(partition_by)
+        self.drop_columns = set(drop_columns) | set(partition_by)
+        self.rows_per_file = rows_per_file
+        self.max_buffered_rows = max_buffered_rows
+        self.log_path = os.path.join(root, "runs.log")
+        self.done = set()
+        # partition directory -> (params, [(key, rows) of each run buffered])
+        self.buffers = {}
+        self.buffered_rows = 0
+        if os.path.exists(self.log_path):
+            if resume:
+                self._resume()
+            else:
+                shutil.rmtree(root)
+        elif os.path.isdir(root) and os.listdir(root):
+            raise ValueError(f"{root} is not empty, and has no runs to resume.")
+        os.makedirs(root, exist_ok=True)
+
+    def write(self, key, rows):
+        """Buffer the rows of a run, writing them if enough are buffered.
+
+        Args:
+            key: Key of the run, see run_key().
+            rows: List of the run's rows, dictionaries of column values with
+                the partition parameters and RunId among them.
+        """
+        if not rows:
+            self._log([key])
+            return
+        params = {name: rows[0][name] for name in self.partition_by}
+        directory = os.path.join(self.root, partition_path(params))
+        _, runs = self.buffers.setdefault(directory, (params, []))
+        runs.append((key, rows))
+        self.buffered_rows += len(rows)
+        if sum(len(rows) for _, rows in runs) >= self.rows_per_file:
+            self._write_partition(directory)
+        if self.buffered_rows >= self.max_buffered_rows:
+            self.flush()
+
+    def flush(self):
+        """Write the rows of all the runs buffered."""
+        for directory in list(self.buffers):
+            self._write_partition(directory)
+
+    def _write_partition(self, directory):
+        """Write the runs buffered for a partition to a new file of it."""
+        params, runs = self.buffers.pop(directory)
+        runs.sort(key=lambda run: run[1][0]["RunId"])
+        self.buffered_rows -= sum(len(rows) for _, rows in runs)
+        os.makedirs(directory, exist_ok=True)
+        params_path = os.path.join(directory, "params.json")
+        if not os.path.exists(params_path):
+            with open(params_path, "w") as file:
+                json.dump(params, file, default=str)
+        names = [name for name in runs[0][1][0] if name not in self.drop_columns]
+        columns = {
+            name: [row[name] for _, rows in runs for row in rows] for name in names
+        }
+        part = sum(name.startswith("part-") for name in os.listdir(directory))
+        path = os.path.join(directory, f"part-{part:05d}.{self.file_format}")
+        with open(path + ".tmp", "wb") as file:
+            if self.file_format == "parquet":
+                pq.write_table(_arrow_table(columns), file, compression="zstd")
+            else:
+                np.savez_compressed(
+                    file,
+                    **{name: _array(values) for name, values in columns.items()},
+                )
+        os.replace(path + ".tmp", path)
+        self._log([key for key, _ in runs], path)
+
+    def _log(self, keys, path=None):
+        """Record runs as written, to the file at path if they have rows."""
+        file = path and os.path.relpath(path, self.root)
+        with open(self.log_path, "a") as log:
+            log.writelines(
+                json.dumps({"run": key, "file": file}) + "\n" for key in keys
+            )
+        self.done.update(keys)
+
+    def _resume(self):
+        """Read the runs written, and remove the files of runs not logged."""
+        files = set()
+        with open(self.log_path) as log:
+            for line in log:
+                entry = json.loads(line)
+                self.done.add(entry["run"])
+                files.add(entry["file"])
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                if (
+                    name.startswith("part-")
+                    and os.path.relpath(path, self.root) not in files
+                ):
+                    os.remove(path)
+
+
+def partition_path(params):
+    """Return the relative path of the partition of a parameter combination."""
+    return os.path.join(
+        *(f"{name}={_path_value(value)}" for name, value in params.items())
+    )
+
+
+def _path_value(value):
+    return str(value).replace(os.sep, "_")
+
+
+def _arrow_table(columns):
+    """Return a pyarrow Table of the columns, with strings dictionary encoded."""
+    table = pa.table(columns)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_string(field.type):
+            table = table.set_column(
+                i, field.name, pc.dictionary_encode(table.column(i))
+            )
+    return table
+
+
+def _array(values):
+    """Return a typed array of the values, as strings if they have no dtype."""
+    array = np.asarray(values)
+    if array.dtype == object or array.ndim != 1:
+        array = np.array([str(value) for value in values])
+    return array
+
+
+def _selected(directory, params):
+    """Return whether a partition directory matches the selected params."""
+    name, _, value = directory.partition("=")
+    return name not in params or value == _path_value(params[name])
+
+
+def load_runs(root, columns=None, **params):
+    """Load runs written by a ColumnarRunWriter into a DataFrame.
+
+    Only the selected partitions are read, and only the selected columns of
+    their files.
+
+    Args:
+        root: Directory of the partitions.
+        columns: List of the columns to load, by default all of them; the
+            partition parameters are always included.
+        params: Values of partition parameters selecting the partitions to
+            load, e.g. init_people=25.
+    """
+    frames = []
+    for directory, subdirectories, files in os.walk(root):
+        # skip the partitions of other values of the selected parameters
+        subdirectories[:] = sorted(
+            name for name in subdirectories if _selected(name, params)
+        )
+        if "params.json" not in files:
+            continue
+        with open(os.path.join(directory, "params.json")) as file:
+            partition = json.load(file)
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            if name.endswith(".parquet"):
+                frame = pd.read_parquet(path, columns=columns)
+            elif name.endswith(".npz"):
+                with np.load(path) as data:
+                    frame = pd.DataFrame(
+                        {column: data[column] for column in columns or data.files}
+                    )
+            else:
+                continue
+            frames.append(frame.assign(**partition))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -0,0 +1,174 @@
+"""
+Array-backed accounts for the people of the Bank Reserves model.
+
+Each person's savings, loans, wallet and wealth are entries of NumPy arrays
+indexed by account number, held by the bank's Ledger, rather than Python
+attributes. The model's reporters are then reductions over the arrays, and
+an operation on every account (paying interest, a transfer to every wallet)
+is one array operation. The ledger also keeps the bank's totals of deposits
+and loans up to date as the accounts change.
+
+Amounts of money are whole numbers, so the arrays hold integers, as the
+attributes did, until an amount that is not an integer (a loan of a fraction
+of the deposits, interest) is put in one of them: like a Python int, the
+field then holds floats from there on.
+"""
+
+import numpy as np
+
+
+class Ledger:
+    """
+    The accounts of all the people, as arrays indexed by account number.
+
+    Attributes:
+        savings, loans, wallet, wealth: Arrays of the accounts' fields (views,
+            valid until the next account is opened or the field holds floats).
+        deposits: Total savings of the accounts, i.e. the bank's deposits.
+        bank_loans: Total loans outstanding.
+        version: Number of changes made to the accounts so far, for caching
+            results computed from them.
+    """
+
+    fields = ("savings", "loans", "wallet", "wealth")
+
+    def __init__(self, capacity=64):
+        """
+        Args:
+            capacity: Number of accounts to allocate storage for at first; it
+                doubles as needed.
+        """
+        self.size = 0
+        self._data = {
+            field: np.zeros(capacity, dtype=np.int64) for field in self.fields
+        }
+        self.deposits = 0
+        self.bank_loans = 0
+        self.version = 0
+
+    def open_account(self, wallet=0):
+        """Open an account with some money in the wallet, return its number."""
+        if self.size == len(self._data["savings"]):
+            for field, values in self._data.items():
+                grown = np.zeros(2 * len(values), dtype=values.dtype)
+                grown[: self.size] = values
+                self._data[field] = grown
+        account = self.size
+        self._widen("wallet", wallet)
+        self._data["wallet"][account] = wallet
+        self.size += 1
+        self.version += 1
+        return account
+
+    @property
+    def savings(self):
+        return self._data["savings"][: self.size]
+
+    @property
+    def loans(self):
+        return self._data["loans"][: self.size]
+
+    @property
+    def wallet(self):
+        return self._data["wallet"][: self.size]
+
+    @property
+    def wealth(self):
+        return self._data["wealth"][: self.size]
+
+    def _widen(self, field, value):
+        """Make a field hold floats if value is not an integer."""
+        values = self._data[field]
+        dtype = np.result_type(values, value)
+        if dtype != values.dtype:
+            self._data[field] = values.astype(dtype)
+
+    def deposit(self, account, amount):
+        """Move amount from the wallet to the savings of an account."""
+        self._widen("wallet", amount)
+        self._widen("savings", amount)
+        self._data["wallet"][account] -= amount
+        self._data["savings"][account] += amount
+        self.deposits += amount
+        self.version += 1
+
+    def withdraw(self, account, amount):
+        """Move amount from the savings to the wallet of an account."""
+        self._widen("wallet", amount)
+        self._widen("savings", amount)
+        self._data["wallet"][account] += amount
+        self._data["savings"][account] -= amount
+        self.deposits -= amount
+        self.version += 1
+
+    def borrow(self, account, amount):
+        """Lend amount to an account, into its wallet."""
+        self._widen("loans", amount)
+        self._widen("wallet", amount)
+        self._data["loans"][account] += amount
+        self._data["wallet"][account] += amount
+        self.bank_loans += amount
+        self.version += 1
+
+    def repay(self, account, amount):
+        """Repay amount of the loans of an account, from its wallet."""
+        self._widen("loans", amount)
+        self._widen("wallet", amount)
+        self._data["loans"][account] -= amount
+        self._data["wallet"][account] -= amount
+        self.bank_loans -= amount
+        self.version += 1
+
+    def pay_interest(self, savings_rate=0.0, loans_rate=0.0):
+        """Add interest to the savings and the loans of every account.
+
+        Args:
+            savings_rate, loans_rate: Interest rates for the period, e.g. 0.01.
+        """
+        self._widen("savings", 1 + savings_rate)
+        self._widen("loans", 1 + loans_rate)
+        self.savings[:] *= 1 + savings_rate
+        self.loans[:] *= 1 + loans_rate
+        self._widen("wealth", self.savings - self.loans)
+        self.wealth[:] = self.savings - self.loans
+        self.update_totals()
+
+    def credit_wallets(self, amounts):
+        """Add amounts to the wallets, one per account or the same for all.
+
+        Negative amounts take money out, e.g. for a tax.
+        """
+        self._widen("wallet", amounts)
+        self.wallet[:] += amounts
+        self.version += 1
+
+    def update_totals(self):
+        """Recompute the totals of deposits and loans from the accounts."""
+        self.deposits = self.savings.sum().item()
+        self.bank_loans = self.loans.sum().item()
+        self.version += 1
+
+
+class AccountField:
+    """
+    A field of a person's account, as an attribute of the person.
+
+    The person has ledger and account attributes. Savings and loans are read
+    only: they only change through the ledger's deposit(), withdraw(),
+    borrow() and repay(), which keep its totals up to date.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, person, owner=None):
+        if person is None:
+            return self
+        return person.ledger._data[self.name].item(person.account)
+
+    def __set__(self, person, value):
+        if self.name in ("savings", "loans"):
+            raise AttributeError(f"{self.name} only change through the ledger.")
+        person.ledger._widen(self.name, value)
+        person.ledger._data[self.name][person.account] = value
+        person.ledger.version += 1
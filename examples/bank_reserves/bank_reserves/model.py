@@ -9,6 +9,8 @@ Author of NetLogo code:
     Northwestern University, Evanston, IL.
 """
 
+import functools
+
 import mesa
 import numpy as np
 
@@ -22,61 +24,114 @@ For details see batch_run.py in the same directory as run.py.
 # Start of datacollector functions
 
 
+def compute_financial_report(model):
+    """return all the financial aggregates of the people, as reductions over
+    the accounts in the bank's ledger
+
+    Use get_financial_report(), which computes them once per step.
+    """
+
+    ledger = model.bank.ledger
+    savings, loans = ledger.savings, ledger.loans
+    total_savings = np.sum(savings)
+    total_wallets = np.sum(ledger.wallet)
+    return {
+        "Rich": int(np.count_nonzero(savings > model.rich_threshold)),
+        "Poor": int(np.count_nonzero(loans > 10)),
+        "Middle Class": int(
+            np.count_nonzero((loans < 10) & (savings < model.rich_threshold))
+        ),
+        "Savings": total_savings,
+        "Wallets": total_wallets,
+        "Money": total_wallets + total_savings,
+        "Loans": np.sum(loans),
+    }
+
+
+# names of the aggregates of compute_financial_report()
+FINANCIAL_COLUMNS = [
+    "Rich",
+    "Poor",
+    "Middle Class",
+    "Savings",
+    "Wallets",
+    "Money",
+    "Loans",
+]
+
+
+def get_financial_report(model):
+    """return the financial aggregates of the people at the current step
+
+    The report is cached on the model, keyed by the step and the version of
+    the bank's ledger, so that the reporters below, each taking one of its
+    aggregates, cost a single computation between them, in any order, until
+    an account changes.
+    """
+
+    key = (model.schedule.steps, model.bank.ledger.version)
+    cached = getattr(model, "_financial_report", None)
+    if cached is None or cached[0] != key:
+        cached = (key, compute_financial_report(model))
+        model._financial_report = cached
+    return cached[1]
+
+
+def fan_out(report, columns):
+    """return a model reporter for each of the columns of report(model)
+
+    report should be cached, as get_financial_report() is.
+    """
+
+    return {
+        column: functools.partial(_report_column, report, column) for column in columns
+    }
+
+
+def _report_column(report, column, model):
+    return report(model)[column]
+
+
 def get_num_rich_agents(model):
     """return number of rich agents"""
 
-    rich_agents = [a for a in model.schedule.agents if a.savings > model.rich_threshold]
-    return len(rich_agents)
+    return get_financial_report(model)["Rich"]
 
 
 def get_num_poor_agents(model):
     """return number of poor agents"""
 
-    poor_agents = [a for a in model.schedule.agents if a.loans > 10]
-    return len(poor_agents)
+    return get_financial_report(model)["Poor"]
 
 
 def get_num_mid_agents(model):
     """return number of middle class agents"""
 
-    mid_agents = [
-        a
-        for a in model.schedule.agents
-        if a.loans < 10 and a.savings < model.rich_threshold
-    ]
-    return len(mid_agents)
+    return get_financial_report(model)["Middle Class"]
 
 
 def get_total_savings(model):
     """sum of all agents' savings"""
 
-    agent_savings = [a.savings for a in model.schedule.agents]
-    # return the sum of agents' savings
-    return np.sum(agent_savings)
+    return get_financial_report(model)["Savings"]
 
 
 def get_total_wallets(model):
     """sum of amounts of all agents' wallets"""
 
-    agent_wallets = [a.wallet for a in model.schedule.agents]
-    # return the sum of all agents' wallets
-    return np.sum(agent_wallets)
+    return get_financial_report(model)["Wallets"]
 
 
 def get_total_money(model):
-    # sum of all agents' wallets
-    wallet_money = get_total_wallets(model)
-    # sum of all agents' savings
-    savings_money = get_total_savings(model)
-    # return sum of agents' wallets and savings for total money
-    return wallet_money + savings_money
+    """sum of all agents' wallets and savings"""
+
+    return get_financial_report(model)["Money"]
 
 
 def get_total_loans(model):
-    # list of amounts of all agents' loans
-    agent_loans = [a.loans for a in model.schedule.agents]
-    # return sum of all agents' loans
-    return np.sum(agent_loans)
+    """sum of all agents' loans"""
+
+    return get_financial_report(model)["Loans"]
 
 
 class BankReserves(mesa.Model):
@@ -123,15 +178,7 @@ class BankReserves(mesa.Model):
         self.reserve_percent = reserve_percent
         # see datacollector functions above
         self.datacollector = mesa.DataCollector(
-            model_reporters={
-                "Rich": get_num_rich_agents,
-                "Poor": get_num_poor_agents,
-                "Middle Class": get_num_mid_agents,
-                "Savings": get_total_savings,
-                "Wallets": get_total_wallets,
-                "Money": get_total_money,
-                "Loans": get_total_loans,
-            },
+            model_reporters=fan_out(get_financial_report, FINANCIAL_COLUMNS),
             agent_reporters={"Wealth": lambda x: x.wealth},
         )
 
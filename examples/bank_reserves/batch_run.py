@@ -18,82 +18,26 @@ The BatchRunner is set up to collect step by step data of the model. It does
 this by collecting the DataCollector object in a model_reporter (i.e. the
 DataCollector is collecting itself every step).
 
-The end result of the batch run will be a CSV file created in the same
-directory from which Python was run. The CSV file will contain the data from
-every step of every run.
+The end result of the batch run will be a directory created in the same
+directory from which Python was run, with a partition for each combination
+of parameters, holding the rows of its runs in a few Parquet files (or
+compressed .npz files, without pyarrow), written in batches of runs; load
+them with bank_reserves.batch.load_runs(). With --format csv, it is instead
+a CSV file with the data from every step of every run. The runs are spread
+over a pool of processes, and handed to the writer as they finish; running
+batch_run.py again resumes an interrupted sweep (see bank_reserves/batch.py).
 """
 
+import argparse
 import itertools
 
 import mesa
-import numpy as np
-import pandas as pd
 
 from bank_reserves.agents import Bank, Person
+from bank_reserves.batch import ColumnarRunWriter, CSVRunWriter, run_batch
+from bank_reserves.model import FINANCIAL_COLUMNS, fan_out, get_financial_report
 
-# Start of datacollector functions
-
-
-def get_num_rich_agents(model):
-    """list of rich agents"""
-
-    rich_agents = [a for a in model.schedule.agents if a.savings > model.rich_threshold]
-    # return number of rich agents
-    return len(rich_agents)
-
-
-def get_num_poor_agents(model):
-    """list of poor agents"""
-
-    poor_agents = [a for a in model.schedule.agents if a.loans > 10]
-    # return number of poor agents
-    return len(poor_agents)
-
-
-def get_num_mid_agents(model):
-    """list of middle class agents"""
-
-    mid_agents = [
-        a
-        for a in model.schedule.agents
-        if a.loans < 10 and a.savings < model.rich_threshold
-    ]
-    # return number of middle class agents
-    return len(mid_agents)
-
-
-def get_total_savings(model):
-    """list of amounts of all agents' savings"""
-
-    agent_savings = [a.savings for a in model.schedule.agents]
-    # return the sum of agents' savings
-    return np.sum(agent_savings)
-
-
-def get_total_wallets(model):
-    """list of amounts of all agents' wallets"""
-
-    agent_wallets = [a.wallet for a in model.schedule.agents]
-    # return the sum of all agents' wallets
-    return np.sum(agent_wallets)
-
-
-def get_total_money(model):
-    """sum of all agents' wallets"""
-
-    wallet_money = get_total_wallets(model)
-    # sum of all agents' savings
-    savings_money = get_total_savings(model)
-    # return sum of agents' wallets and savings for total money
-    return wallet_money + savings_money
-
-
-def get_total_loans(model):
-    """list of amounts of all agents' loans"""
-
-    agent_loans = [a.loans for a in model.schedule.agents]
-    # return sum of all agents' loans
-    return np.sum(agent_loans)
+# Start of datacollector functions (see also bank_reserves/model.py)
 
 
 def track_params(model):
@@ -136,13 +80,8 @@ class BankReservesModel(mesa.Model):
         # see datacollector functions above
         self.datacollector = mesa.DataCollector(
             model_reporters={
-                "Rich": get_num_rich_agents,
-                "Poor": get_num_poor_agents,
-                "Middle Class": get_num_mid_agents,
-                "Savings": get_total_savings,
-                "Wallets": get_total_wallets,
-                "Money": get_total_money,
-                "Loans": get_total_loans,
+                # the financial aggregates, computed in one pass
+                **fan_out(get_financial_report, FINANCIAL_COLUMNS),
                 "Model Params": track_params,
                 "Run": track_run,
             },
@@ -185,12 +124,57 @@ br_params = {
 }
 
 if __name__ == "__main__":
-    data = mesa.batch_run(
+    parser = argparse.ArgumentParser(description="Bank Reserves parameter sweep.")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: all the CPUs).",
+    )
+    parser.add_argument("--iterations", type=int, default=1)
+    parser.add_argument("--max-steps", type=int, default=1000)
+    parser.add_argument(
+        "--format",
+        choices=["columnar", "parquet", "npz", "csv"],
+        default="columnar",
+        help="columnar: Parquet if pyarrow is installed, else .npz files.",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Output directory, or file for csv (default: BankReservesModel_Data).",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Start the sweep over instead of resuming it.",
+    )
+    args = parser.parse_args()
+
+    # each run's rows are written as soon as it finishes, and an interrupted
+    # sweep resumes with the runs not yet written
+    if args.format == "csv":
+        writer = CSVRunWriter(
+            args.output or "BankReservesModel_Data.csv", resume=not args.restart
+        )
+    else:
+        # one partition per combination of the swept parameters, which stores
+        # them once, so the "Model Params" column repeating them is dropped
+        writer = ColumnarRunWriter(
+            args.output or "BankReservesModel_Data",
+            partition_by=list(br_params),
+            drop_columns=["Model Params"],
+            resume=not args.restart,
+            file_format=None if args.format == "columnar" else args.format,
+        )
+    run_batch(
         BankReservesModel,
         br_params,
+        writer,
+        processes=args.processes,
+        iterations=args.iterations,
+        max_steps=args.max_steps,
     )
-    br_df = pd.DataFrame(data)
-    br_df.to_csv("BankReservesModel_Data.csv")
 
     # The commented out code below is the equivalent code as above, but done
     # via the legacy BatchRunner class. This is a good example to look at if
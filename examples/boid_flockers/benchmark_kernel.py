@@ -0,0 +1,98 @@
+"""
+Compare the per-agent and the vectorized BoidFlockers steps.
+
+First checks that, from the same snapshot of a flock, the kernel gives every
+boid the velocity Boid.step computes for it, with the headings to its
+neighbors taken the short way around the torus. (Boid.step itself takes them
+from space.get_heading, which wraps a negative heading into the space, e.g.
+-1 into width - 1, so the two paths are not expected to agree exactly.)
+Then times a few steps of both paths at increasing populations, at constant
+density.
+
+Usage:
+    python benchmark_kernel.py [--populations 1000 4000 16000] [--steps 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from boid_flockers.kernel import flock
+from boid_flockers.model import BoidFlockers
+from boid_flockers.neighbors import displacement
+
+
+def per_agent_velocities(model):
+    """Velocities Boid.step would give each boid, without moving any, with
+    minimum image headings."""
+    velocities = []
+    for boid in model.schedule.agents:
+        neighbors = model.space.get_neighbors(boid.pos, boid.vision, False)
+        headings = np.array(
+            [displacement(model.space, boid.pos, other.pos) for other in neighbors]
+        ).reshape(-1, 2)
+        cohere = headings.mean(axis=0) if neighbors else np.zeros(2)
+        close = np.linalg.norm(headings, axis=1) < boid.separation
+        separate = -headings[close].sum(axis=0)
+        velocity = (
+            boid.velocity
+            + (
+                cohere * boid.cohere_factor
+                + separate * boid.separate_factor
+                + boid.match_heading(neighbors) * boid.match_factor
+            )
+            / 2
+        )
+        velocities.append(velocity / np.linalg.norm(velocity))
+    return np.array(velocities)
+
+
+def kernel_velocities(model):
+    agents = model.schedule.agents
+    positions = np.array([agent.pos for agent in agents], dtype=float)
+    velocities = np.array([agent.velocity for agent in agents], dtype=float)
+    model.neighbors.rebuild(agents, positions)
+    i, j, deltas = model.neighbors.pairs(model.vision)
+    return flock(velocities, i, j, deltas, model.separation, **model.factors)
+
+
+def check_equivalence(population=500, steps=20):
+    model = BoidFlockers(population=population, vectorized=True)
+    for _ in range(steps):
+        model.step()
+    error = np.abs(per_agent_velocities(model) - kernel_velocities(model)).max()
+    print(f"Largest velocity difference after {steps} steps: {error:.2e}")
+    return error
+
+
+def time_steps(population, steps, vectorized):
+    # Keep about 0.01 boid per unit area, as in the default model.
+    side = (population / 0.01) ** 0.5
+    model = BoidFlockers(
+        population=population,
+        width=side,
+        height=side,
+        vectorized=vectorized,
+    )
+    start = time.perf_counter()
+    for _ in range(steps):
+        model.step()
+    return (time.perf_counter() - start) / steps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--populations", type=int, nargs="+", default=[1000, 4000])
+    parser.add_argument("--steps", type=int, default=5)
+    args = parser.parse_args()
+
+    check_equivalence()
+    print(f"{'boids':>8} {'per-agent (s)':>14} {'vectorized (s)':>15} {'speedup':>8}")
+    for population in args.populations:
+        per_agent = time_steps(population, args.steps, vectorized=False)
+        vectorized = time_steps(population, args.steps, vectorized=True)
+        print(
+            f"{population:>8} {per_agent:>14.4f} {vectorized:>15.4f}"
+            f" {per_agent / vectorized:>7.1f}x"
+        )
@@ -0,0 +1,269 @@
+"""
+Benchmark how BoidFlockers scales with population, vision and density.
+
+Runs the model headless for every combination of the given populations,
+vision:separation settings, scalings and update modes, each in a fresh
+process, and records:
+    - steps per second,
+    - peak resident memory, and the part of it used by the model,
+    - seconds per step spent in each phase: neighbor search (building and
+      querying the cell list), forces (the three drives), move (moving the
+      boids in the space), metrics (flock structure and data collection),
+      and other (everything else, such as scheduling).
+The phases are timed in a second run with the phase functions wrapped in
+timers, which slows the per-agent mode down; steps per second are measured
+without them.
+
+With constant density the space grows with the population, at --density
+boids per unit area; with constant area it stays --side wide. The per-agent
+mode is skipped above --max-agent-population boids.
+
+Results are written as JSON with --output, and --compare prints the change
+from an earlier results file for the configurations both contain:
+
+    $ python benchmark_suite.py --output before.json
+    $ python benchmark_suite.py --output after.json --compare before.json
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import multiprocessing
+import platform
+import resource
+import time
+
+import mesa
+import numpy as np
+
+import boid_flockers.model
+from boid_flockers.boid import Boid
+from boid_flockers.model import BoidFlockers
+from boid_flockers.neighbors import CellList
+
+PHASES = ["search", "forces", "move", "metrics"]
+
+
+class PhaseTimer:
+    """
+    Accumulates the time spent in wrapped functions, by phase.
+
+    Calls made from within a timed phase count towards that phase, so that
+    e.g. the cell list queries made while updating the flock metrics are
+    counted as metrics, not as neighbor search.
+    """
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.active = False
+
+    def wrap(self, function, phase):
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            if self.active:
+                return function(*args, **kwargs)
+            self.active = True
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.seconds[phase] += time.perf_counter() - start
+                self.active = False
+
+        return timed
+
+    def instrument(self):
+        """Wrap the phase functions of the model, for the current process."""
+        for owner, name, phase in [
+            (CellList, "rebuild", "search"),
+            (CellList, "pairs", "search"),
+            (CellList, "get_neighbors", "search"),
+            (Boid, "cohere", "forces"),
+            (Boid, "separate", "forces"),
+            (Boid, "match_heading", "forces"),
+            (boid_flockers.model, "flock", "forces"),
+            (mesa.space.ContinuousSpace, "move_agent", "move"),
+            (boid_flockers.model, "wrap", "move"),
+            (BoidFlockers, "update_flocks", "metrics"),
+            (mesa.DataCollector, "collect", "metrics"),
+        ]:
+            setattr(owner, name, self.wrap(getattr(owner, name), phase))
+
+
+def make_model(config):
+    if config["scaling"] == "density":
+        side = (config["population"] / config["density"]) ** 0.5
+    else:
+        side = config["side"]
+    return BoidFlockers(
+        population=config["population"],
+        width=side,
+        height=side,
+        vision=config["vision"],
+        separation=config["separation"],
+        vectorized=config["mode"] == "vectorized",
+    )
+
+
+def run_steps(model, steps):
+    start = time.perf_counter()
+    for _ in range(steps):
+        model.step()
+    return time.perf_counter() - start
+
+
+def run_config(config):
+    """Benchmark one configuration; meant to run in a fresh process."""
+    # ru_maxrss is in kilobytes on Linux.
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    model = make_model(config)
+    run_steps(model, config["warmup"])
+    seconds = run_steps(model, config["steps"])
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timer = PhaseTimer()
+    timer.instrument()
+    model = make_model(config)
+    run_steps(model, config["warmup"])
+    timer.seconds = dict.fromkeys(PHASES, 0.0)
+    timed_seconds = run_steps(model, config["steps"])
+    phases = {phase: timer.seconds[phase] / config["steps"] for phase in PHASES}
+    phases["other"] = timed_seconds / config["steps"] - sum(phases.values())
+
+    return dict(
+        config,
+        steps_per_second=config["steps"] / seconds,
+        peak_rss_mib=peak_rss / 1024,
+        model_rss_mib=(peak_rss - baseline_rss) / 1024,
+        phases=phases,
+    )
+
+
+def config_key(result):
+    return tuple(
+        result[name]
+        for name in ["mode", "scaling", "population", "vision", "separation"]
+    )
+
+
+def print_header():
+    print(
+        f"{'mode':>10} {'scaling':>8} {'boids':>7} {'vision':>6} {'sep':>4}"
+        f" {'steps/s':>9} {'MiB':>7}"
+        + "".join(f" {phase:>8}" for phase in PHASES + ["other"])
+    )
+
+
+def print_result(result):
+    print(
+        f"{result['mode']:>10} {result['scaling']:>8}"
+        f" {result['population']:>7} {result['vision']:>6g}"
+        f" {result['separation']:>4g} {result['steps_per_second']:>9.2f}"
+        f" {result['model_rss_mib']:>7.1f}"
+        + "".join(f" {result['phases'][phase]:>8.4f}" for phase in PHASES + ["other"])
+    )
+
+
+def compare(results, baseline, threshold):
+    """Print the change in steps per second and memory from baseline."""
+    previous = {config_key(result): result for result in baseline["results"]}
+    print(f"\nChange from baseline (flagged beyond {threshold:.0%}):")
+    print(
+        f"{'mode':>10} {'scaling':>8} {'boids':>7} {'vision':>6} {'sep':>4}"
+        f" {'steps/s':>9} {'memory':>8}"
+    )
+    for result in results:
+        before = previous.get(config_key(result))
+        if before is None:
+            continue
+        speed = result["steps_per_second"] / before["steps_per_second"] - 1
+        memory = (result["peak_rss_mib"] - before["peak_rss_mib"]) / before[
+            "peak_rss_mib"
+        ]
+        flag = ""
+        if speed < -threshold or memory > threshold:
+            flag = "  worse"
+        elif speed > threshold or memory < -threshold:
+            flag = "  better"
+        print(
+            f"{result['mode']:>10} {result['scaling']:>8}"
+            f" {result['population']:>7} {result['vision']:>6g}"
+            f" {result['separation']:>4g} {speed:>+9.1%} {memory:>+8.1%}{flag}"
+        )
+
+
+def parse_setting(setting):
+    vision, separation = setting.split(":")
+    return float(vision), float(separation)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--populations", type=int, nargs="+", default=[100, 1000, 10000, 100000]
+    )
+    parser.add_argument(
+        "--settings",
+        type=parse_setting,
+        nargs="+",
+        default=[(10, 2), (5, 1), (20, 4)],
+        metavar="VISION:SEPARATION",
+    )
+    parser.add_argument(
+        "--scalings", nargs="+", choices=["density", "area"], default=["density"]
+    )
+    parser.add_argument(
+        "--modes", nargs="+", choices=["agent", "vectorized"], default=["vectorized"]
+    )
+    parser.add_argument("--density", type=float, default=0.01)
+    parser.add_argument("--side", type=float, default=1000)
+    parser.add_argument("--max-agent-population", type=int, default=10000)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="Earlier results to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    configs = [
+        dict(
+            mode=mode,
+            scaling=scaling,
+            population=population,
+            vision=vision,
+            separation=separation,
+            density=args.density,
+            side=args.side,
+            steps=args.steps,
+            warmup=args.warmup,
+        )
+        for mode, scaling, population, (vision, separation) in itertools.product(
+            args.modes, args.scalings, args.populations, args.settings
+        )
+        if mode == "vectorized" or population <= args.max_agent_population
+    ]
+    # A fresh process per configuration, so that peak memory and the timing
+    # wrappers do not carry over.
+    print_header()
+    with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+        results = []
+        for result in pool.imap(run_config, configs):
+            print_result(result)
+            results.append(result)
+
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "mesa": mesa.__version__,
+            "processor": platform.processor() or platform.machine(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f), args.threshold)
@@ -0,0 +1,52 @@
+"""
+Time the vectorized BoidFlockers step with 1 to N threads.
+
+The flock is split in as many chunks as threads, which update disjoint rows
+of the model's next buffers concurrently; the speedup is bounded by the
+share of the step spent in NumPy calls which release the GIL, and by the
+number of cores.
+
+Usage:
+    python benchmark_threads.py [--population 100000] [--max-threads 8]
+"""
+
+import argparse
+import os
+import time
+
+from boid_flockers.model import BoidFlockers
+
+
+def time_steps(population, threads, steps):
+    # Keep about 0.01 boid per unit area, as in the default model.
+    side = (population / 0.01) ** 0.5
+    model = BoidFlockers(
+        population=population,
+        width=side,
+        height=side,
+        vectorized=True,
+        threads=threads,
+    )
+    model.step()
+    start = time.perf_counter()
+    for _ in range(steps):
+        model.step()
+    return (time.perf_counter() - start) / steps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--population", type=int, default=100000)
+    parser.add_argument("--max-threads", type=int, default=os.cpu_count())
+    parser.add_argument("--steps", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.population} boids, {os.cpu_count()} cores")
+    print(f"{'threads':>8} {'s/step':>8} {'speedup':>8}")
+    baseline = None
+    threads = 1
+    while threads <= args.max_threads:
+        seconds = time_steps(args.population, threads, args.steps)
+        baseline = baseline or seconds
+        print(f"{threads:>8} {seconds:>8.4f} {baseline / seconds:>7.2f}x")
+        threads *= 2
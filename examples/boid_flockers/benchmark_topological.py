@@ -0,0 +1,50 @@
+"""
+Compare the cost of a step with metric and topological neighborhoods.
+
+With a fixed vision radius, the number of neighbors of a Boid grows with the
+density of the flock; with k_nearest set, each Boid flocks with at most k of
+them. This times both modes, for the per-agent and the vectorized steps, as
+more and more Boids are packed in the same space.
+
+Usage:
+    python benchmark_topological.py [--populations 500 1000 2000] [--k 7]
+"""
+
+import argparse
+import time
+
+from boid_flockers.model import BoidFlockers
+
+
+def time_steps(population, steps, vectorized, k_nearest=None):
+    model = BoidFlockers(
+        population=population, k_nearest=k_nearest, vectorized=vectorized
+    )
+    start = time.perf_counter()
+    for _ in range(steps):
+        model.step()
+    return (time.perf_counter() - start) / steps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--populations", type=int, nargs="+", default=[500, 1000, 2000])
+    parser.add_argument("--k", type=int, default=7)
+    parser.add_argument("--steps", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Seconds per step, in a 100x100 space, metric vs k = {args.k}:")
+    print(
+        f"{'boids':>8} {'per-agent':>10} {'topological':>12}"
+        f" {'vectorized':>11} {'topological':>12}"
+    )
+    for population in args.populations:
+        times = [
+            time_steps(population, args.steps, vectorized, k_nearest)
+            for vectorized in (False, True)
+            for k_nearest in (None, args.k)
+        ]
+        print(
+            f"{population:>8} {times[0]:>10.4f} {times[1]:>12.4f}"
+            f" {times[2]:>11.4f} {times[3]:>12.4f}"
+        )
@@ -1,4 +1,7 @@
+import base64
+
 import mesa
+import numpy as np
 
 
 class SimpleCanvas(mesa.visualization.VisualizationElement):
@@ -7,19 +10,41 @@ class SimpleCanvas(mesa.visualization.VisualizationElement):
     canvas_height = 500
     canvas_width = 500
 
-    def __init__(self, portrayal_method, canvas_height=500, canvas_width=500):
+    def __init__(
+        self,
+        portrayal_method,
+        canvas_height=500,
+        canvas_width=500,
+        binary=False,
+        headings=False,
+    ):
         """
         Instantiate a new SimpleCanvas
+
+        Args:
+            portrayal_method: Function of an agent returning its portrayal.
+            canvas_height, canvas_width: Size of the canvas, in pixels.
+            binary: If True, every agent is drawn with the portrayal of the
+                first agent, which is sent once per model, and each frame only
+                carries the agents' normalized positions, packed as a
+                base64-encoded Float32 buffer instead of a JSON dict per agent.
+            headings: If True (binary only), also send each agent's heading,
+                from its velocity, and draw it.
         """
         self.portrayal_method = portrayal_method
         self.canvas_height = canvas_height
         self.canvas_width = canvas_width
+        self.binary = binary
+        self.headings = headings
+        self.styled_model = None
         new_element = "new Simple_Continuous_Module({}, {})".format(
             self.canvas_width, self.canvas_height
         )
         self.js_code = "elements.push(" + new_element + ");"
 
     def render(self, model):
+        if self.binary:
+            return self.render_binary(model)
         space_state = []
         for obj in model.schedule.agents:
             portrayal = self.portrayal_method(obj)
@@ -30,3 +55,41 @@ class SimpleCanvas(mesa.visualization.VisualizationElement):
             portrayal["y"] = y
             space_state.append(portrayal)
         return space_state
+
+    def render_binary(self, model):
+        """
+        Return the frame as {"count", "stride", "buffer"}, plus "style" on the
+        first frame of each model.
+
+        The buffer holds count records of stride float32 values: x and y,
+        normalized to [0, 1], then the heading in radians if headings is set.
+        """
+        agents = model.schedule.agents
+        space = model.space
+        # The vectorized model already holds the positions in an array.
+        positions = getattr(model, "positions", None)
+        if positions is None or len(positions) != len(agents):
+            positions = np.array([agent.pos for agent in agents], dtype=float)
+        positions = positions.reshape(-1, 2)
+        columns = [
+            (positions[:, 0] - space.x_min) / (space.x_max - space.x_min),
+            (positions[:, 1] - space.y_min) / (space.y_max - space.y_min),
+        ]
+        if self.headings:
+            velocities = getattr(model, "velocities", None)
+            if velocities is None or len(velocities) != len(agents):
+                velocities = np.array([agent.velocity for agent in agents])
+            velocities = velocities.reshape(-1, 2)
+            columns.append(np.arctan2(velocities[:, 1], velocities[:, 0]))
+        records = np.stack(columns, axis=1).astype("<f4")
+        frame = {
+            "count": len(records),
+            "stride": records.shape[1],
+            "buffer": base64.b64encode(records.tobytes()).decode("ascii"),
+        }
+        # The style is static, so it is only sent with the first frame of a
+        # model; the browser keeps it until the model is reset.
+        if model is not self.styled_model and agents:
+            frame["style"] = self.portrayal_method(agents[0])
+            self.styled_model = model
+        return frame
@@ -29,6 +29,7 @@ class Boid(mesa.Agent):
         cohere=0.025,
         separate=0.25,
         match=0.04,
+        k_nearest=None,
     ):
         """
         Create a new Boid flocker agent.
@@ -43,6 +44,8 @@ class Boid(mesa.Agent):
             cohere: the relative importance of matching neighbors' positions
             separate: the relative importance of avoiding close neighbors
             match: the relative importance of matching neighbors' headings
+            k_nearest: If given, only flock with the k_nearest nearest Boids
+                within vision.
         """
         super().__init__(unique_id, model)
         self.pos = np.array(pos)
@@ -53,6 +56,7 @@ class Boid(mesa.Agent):
         self.cohere_factor = cohere
         self.separate_factor = separate
         self.match_factor = match
+        self.k_nearest = k_nearest
 
     def cohere(self, neighbors):
         """
@@ -93,7 +97,9 @@ class Boid(mesa.Agent):
         Get the Boid's neighbors, compute the new vector, and move accordingly.
         """
 
-        neighbors = self.model.space.get_neighbors(self.pos, self.vision, False)
+        neighbors = self.model.neighbors.get_neighbors(
+            self.pos, self.vision, False, k=self.k_nearest
+        )
         self.velocity += (
             self.cohere(neighbors) * self.cohere_factor
             + self.separate(neighbors) * self.separate_factor
@@ -0,0 +1,71 @@
+"""
+Flock structure metrics.
+
+A flock is a connected group of boids, two boids being connected when they
+are within vision of each other. Rather than building a graph of the boids,
+the flocks are found by union-find over the neighbor pairs of the model's
+cell list, with the unions of all the pairs done at once, and summarized as
+the list of flock sizes. Polarization, the norm of the mean heading of the
+boids, is 1 when they all fly in the same direction and close to 0 when
+their headings are random.
+
+The reporter functions read the structure the model updates once per step,
+so that they can all be collected without recomputing it.
+"""
+
+import numpy as np
+
+
+def flock_labels(i, j, n):
+    """Label n boids by flock, given the pairs (i, j) of connected boids.
+
+    Returns:
+        Array of the n labels, each the smallest index of a boid in the flock.
+    """
+    labels = np.arange(n)
+    while True:
+        # Compress: point every boid at the root of its tree.
+        while True:
+            roots = labels[labels]
+            if np.array_equal(roots, labels):
+                break
+            labels = roots
+        # Union: hook the larger root of every pair of trees to the smaller.
+        li, lj = labels[i], labels[j]
+        split = li != lj
+        if not split.any():
+            return labels
+        np.minimum.at(
+            labels, np.maximum(li[split], lj[split]), np.minimum(li[split], lj[split])
+        )
+
+
+def flock_sizes(labels):
+    """Return the sizes of the flocks, largest first."""
+    sizes = np.bincount(labels)
+    return -np.sort(-sizes[sizes > 0])
+
+
+def polarization(velocities):
+    """Return the norm of the mean of the boids' unit velocities."""
+    velocities = np.asarray(velocities, dtype=float).reshape(-1, 2)
+    if not len(velocities):
+        return 0.0
+    headings = velocities / np.linalg.norm(velocities, axis=1, keepdims=True)
+    return float(np.linalg.norm(headings.mean(axis=0)))
+
+
+def number_of_flocks(model):
+    return len(model.flock_sizes)
+
+
+def largest_flock(model):
+    return int(model.flock_sizes[0]) if len(model.flock_sizes) else 0
+
+
+def flock_size_distribution(model):
+    return model.flock_sizes.tolist()
+
+
+def compute_polarization(model):
+    return model.polarization
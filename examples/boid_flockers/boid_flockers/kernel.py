@@ -0,0 +1,81 @@
+"""
+Vectorized flocking step.
+
+Boid.step computes the three drives with Python loops over the neighbors of
+one boid at a time. flock() computes them for every boid at once, from
+(N, 2) arrays of positions and velocities and the list of neighbor pairs
+found by CellList.pairs, using bincount to sum over each boid's neighbors.
+
+All the boids are updated from the same snapshot of the flock. Given the same
+positions and velocities, each boid gets the velocity Boid.step would give it
+if space.get_heading returned the minimum image heading on the torus (it
+wraps negative headings into the space instead).
+"""
+
+import numpy as np
+
+
+def neighbor_sums(i, values, n):
+    """Sum values (an (P, 2) array) over the pairs of each of n boids."""
+    return np.stack(
+        [
+            np.bincount(i, weights=values[:, 0], minlength=n),
+            np.bincount(i, weights=values[:, 1], minlength=n),
+        ],
+        axis=1,
+    )
+
+
+def flock(
+    velocities,
+    i,
+    j,
+    deltas,
+    separation,
+    cohere=0.025,
+    separate=0.25,
+    match=0.04,
+    others=None,
+):
+    """
+    Return the boids' new (unit) velocities.
+
+    Args:
+        velocities: (N, 2) array of the boids' velocities.
+        i, j, deltas: Neighbor pairs, and displacements from boid i to boid j,
+            as returned by CellList.pairs. i indexes into velocities.
+        separation: Minimum distance to maintain from other Boids.
+        cohere, separate, match: factors for the relative importance of
+                the three drives.
+        others: Velocities j indexes into, if not velocities; e.g. when
+                velocities only holds a chunk of the flock.
+    """
+    n = len(velocities)
+    counts = np.bincount(i, minlength=n)[:, None]
+    divisor = np.maximum(counts, 1)
+
+    cohere_vector = neighbor_sums(i, deltas, n) / divisor
+    too_close = np.hypot(deltas[:, 0], deltas[:, 1]) < separation
+    separate_vector = -neighbor_sums(i[too_close], deltas[too_close], n)
+    others = velocities if others is None else others
+    match_vector = neighbor_sums(i, others[j], n) / divisor
+
+    velocities = (
+        velocities
+        + (cohere_vector * cohere + separate_vector * separate + match_vector * match)
+        / 2
+    )
+    return velocities / np.linalg.norm(velocities, axis=1, keepdims=True)
+
+
+def wrap(space, positions):
+    """Return positions (an (N, 2) array) wrapped around the space's torus."""
+    positions = np.asarray(positions, dtype=float)
+    if space.torus:
+        low = np.array([space.x_min, space.y_min])
+        positions = low + (positions - low) % np.asarray(space.size)
+    elif np.any(positions < [space.x_min, space.y_min]) or np.any(
+        positions >= [space.x_max, space.y_max]
+    ):
+        raise Exception("Point out of bounds, and space non-toroidal.")
+    return positions
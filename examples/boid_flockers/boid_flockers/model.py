@@ -5,10 +5,29 @@ A Mesa implementation of Craig Reynolds's Boids flocker model.
 Uses numpy arrays to represent vectors.
 """
 
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
 import mesa
 import numpy as np
 
 from .boid import Boid
+from .flocks import (
+    compute_polarization,
+    flock_labels,
+    flock_size_distribution,
+    flock_sizes,
+    largest_flock,
+    number_of_flocks,
+    polarization,
+)
+from .kernel import flock, wrap
+from .neighbors import CellList
+
+# Fewest boids per chunk of the vectorized step: smaller flocks are updated
+# by fewer threads, as handing a small chunk to a thread costs more than it
+# saves.
+MIN_BOIDS_PER_THREAD = 2000
 
 
 class BoidFlockers(mesa.Model):
@@ -27,6 +46,9 @@ class BoidFlockers(mesa.Model):
         cohere=0.025,
         separate=0.25,
         match=0.04,
+        k_nearest=None,
+        vectorized=False,
+        threads=1,
     ):
         """
         Create a new Flockers model.
@@ -39,16 +61,64 @@ class BoidFlockers(mesa.Model):
             separation: What's the minimum distance each Boid will attempt to
                     keep from any other
             cohere, separate, match: factors for the relative importance of
-                    the three drives."""
+                    the three drives.
+            k_nearest: If given, each Boid only flocks with (at most) its
+                    k_nearest nearest neighbors within vision, so that the
+                    work per Boid stays bounded in dense flocks.
+            vectorized: If True, update all the Boids at once, from the same
+                    snapshot of the flock, with the array kernel in kernel.py,
+                    instead of activating them one at a time.
+            threads: Number of threads the vectorized step splits the flock
+                    between (vectorized mode only), each taking at least
+                    MIN_BOIDS_PER_THREAD boids.
+
+        In vectorized mode, the positions and velocities of the flock are held
+        in double-buffered arrays: a step reads the current buffers, writes
+        the next ones, and swaps them, and the Boids' pos and velocity are
+        then views into the current buffers. Since every Boid only writes its
+        own rows of the next buffers, disjoint chunks of the flock can be
+        updated concurrently, with NumPy releasing the GIL."""
+        if threads > 1 and not vectorized:
+            raise ValueError("threads > 1 requires vectorized=True.")
         self.population = population
         self.vision = vision
         self.speed = speed
         self.separation = separation
+        self.k_nearest = k_nearest
+        self.vectorized = vectorized
         self.schedule = mesa.time.RandomActivation(self)
         self.space = mesa.space.ContinuousSpace(width, height, True)
         self.factors = dict(cohere=cohere, separate=separate, match=match)
+        # Boids move by up to speed before their neighbors look around, so
+        # the index is built with that much slack over the vision radius.
+        self.neighbors = CellList(self.space, vision, max_move=speed)
         self.make_agents()
+        if vectorized:
+            agents = self.schedule.agents
+            self.positions = np.array([agent.pos for agent in agents], dtype=float)
+            self.velocities = np.array(
+                [agent.velocity for agent in agents], dtype=float
+            )
+            self.next_positions = np.empty_like(self.positions)
+            self.next_velocities = np.empty_like(self.velocities)
+        self.threads = threads
+        self.executor = None
+        if threads > 1:
+            self.executor = ThreadPoolExecutor(threads)
+            # Stop the pool's threads when the model is discarded, e.g. when
+            # the server resets it.
+            weakref.finalize(self, self.executor.shutdown, wait=False)
+        self.datacollector = mesa.DataCollector(
+            model_reporters={
+                "Flocks": number_of_flocks,
+                "Largest flock": largest_flock,
+                "Flock sizes": flock_size_distribution,
+                "Polarization": compute_polarization,
+            }
+        )
+        self.update_flocks()
         self.running = True
+        self.datacollector.collect(self)
 
     def make_agents(self):
         """
@@ -67,10 +137,80 @@ class BoidFlockers(mesa.Model):
                 velocity,
                 self.vision,
                 self.separation,
+                k_nearest=self.k_nearest,
                 **self.factors
             )
             self.space.place_agent(boid, pos)
             self.schedule.add(boid)
 
     def step(self):
-        self.schedule.step()
+        if self.vectorized:
+            self.vectorized_step()
+        else:
+            self.schedule.step()
+        self.update_flocks()
+        self.datacollector.collect(self)
+
+    def update_flocks(self):
+        """
+        Find the flocks, and the polarization of the Boids, for the reporters.
+
+        The neighbor index is rebuilt here, after every step, and is then used
+        by the next step as well.
+        """
+        agents = self.schedule.agents
+        if self.vectorized:
+            positions, velocities = self.positions, self.velocities
+        else:
+            positions = np.array([agent.pos for agent in agents], dtype=float)
+            velocities = np.array([agent.velocity for agent in agents], dtype=float)
+        self.neighbors.rebuild(agents, positions)
+        i, j, _ = self.neighbors.pairs(self.vision, one_way=True)
+        labels = flock_labels(i, j, len(agents))
+        self.flock_sizes = flock_sizes(labels)
+        self.polarization = polarization(velocities)
+
+    def vectorized_step(self):
+        """
+        Move every Boid at once, from the current position and velocity
+        buffers, then swap in the next ones.
+        """
+        agents = self.schedule.agents
+        num_chunks = max(1, min(self.threads, len(agents) // MIN_BOIDS_PER_THREAD))
+        chunks = [
+            slice(chunk[0], chunk[-1] + 1)
+            for chunk in np.array_split(np.arange(len(agents)), num_chunks)
+            if len(chunk)
+        ]
+        if len(chunks) == 1:
+            self.update_rows(chunks[0])
+        else:
+            list(self.executor.map(self.update_rows, chunks))
+        self.positions, self.next_positions = self.next_positions, self.positions
+        self.velocities, self.next_velocities = self.next_velocities, self.velocities
+        for agent, pos, velocity in zip(agents, self.positions, self.velocities):
+            # The positions are already wrapped, so move_agent keeps the view.
+            self.space.move_agent(agent, pos)
+            agent.velocity = velocity
+        self.schedule.steps += 1
+        self.schedule.time += 1
+
+    def update_rows(self, rows):
+        """
+        Write the next position and velocity of the Boids in rows (a slice)
+        into the next buffers, reading only the current ones.
+        """
+        i, j, deltas = self.neighbors.pairs(self.vision, k=self.k_nearest, rows=rows)
+        velocities = flock(
+            self.velocities[rows],
+            i - rows.start,
+            j,
+            deltas,
+            self.separation,
+            others=self.velocities,
+            **self.factors
+        )
+        self.next_velocities[rows] = velocities
+        self.next_positions[rows] = wrap(
+            self.space, self.positions[rows] + velocities * self.speed
+        )
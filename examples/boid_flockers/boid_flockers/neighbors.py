@@ -0,0 +1,234 @@
+"""
+Spatial-hash neighbor index for the boids.
+
+ContinuousSpace.get_neighbors compares the query point with every agent in the
+space, so when every boid looks for its neighbors a step costs O(N^2). A cell
+list instead buckets the boids in a uniform grid of square cells at least as
+large as the search radius: all the neighbors of a point are then in the 3x3
+block of cells around it, and only those cells are searched.
+"""
+
+import numpy as np
+
+
+def displacement(space, origin, points):
+    """Return the vectors from origin to points, the shortest way on a torus.
+
+    Args:
+        space: The ContinuousSpace the points are in.
+        origin: A position, or (N, 2) array of positions.
+        points: A position, or (N, 2) array of positions.
+    """
+    deltas = np.asarray(points, dtype=float) - np.asarray(origin, dtype=float)
+    if space.torus:
+        # Minimum image: subtract the nearest whole number of periods, which
+        # is much cheaper than a floating point modulo.
+        size = np.asarray(space.size, dtype=float)
+        deltas -= size * np.rint(deltas / size)
+    return deltas
+
+
+def k_nearest_pairs(i, dists, k, n):
+    """Return the indices of the pairs to each of the k nearest agents of i.
+
+    Args:
+        i: Agent of each pair, among n agents, in increasing order.
+        dists: Distance (or squared distance) of each pair.
+        k: Number of pairs to keep per agent, at most.
+    """
+    counts = np.bincount(i, minlength=n)
+    starts = np.cumsum(counts) - counts
+    keep = counts[i] <= k
+    # Agents with more than k pairs keep the k nearest, selected with
+    # argpartition over a block padded with infinite distances.
+    (crowded,) = np.nonzero(counts > k)
+    if len(crowded):
+        crowded_counts = counts[crowded]
+        rows = np.repeat(np.arange(len(crowded)), crowded_counts)
+        columns = np.arange(len(rows)) - np.repeat(
+            np.cumsum(crowded_counts) - crowded_counts, crowded_counts
+        )
+        block = np.full((len(crowded), crowded_counts.max()), np.inf)
+        block[rows, columns] = dists[starts[crowded][rows] + columns]
+        nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+        keep[(starts[crowded][:, None] + nearest).ravel()] = True
+    return np.flatnonzero(keep)
+
+
+class CellList:
+    """
+    A uniform cell list (spatial hash) over the agents of a ContinuousSpace.
+
+    The index is rebuilt from the agents' positions with rebuild(), e.g. once
+    per step. Agents may then move by up to max_move before the next rebuild:
+    the cells are made large enough for the candidates found in them to still
+    include every agent within the search radius, and distances are always
+    checked against the agents' current positions.
+    """
+
+    def __init__(self, space, radius, max_move=0):
+        """
+        Create a new, empty cell list.
+
+        Args:
+            space: The ContinuousSpace the agents live in.
+            radius: Largest search radius the index will be queried with.
+            max_move: Largest distance an agent may move between rebuilds.
+        """
+        self.space = space
+        self.radius = radius
+        cell_size = radius + max_move
+        # Whole number of cells along each axis, each at least cell_size wide.
+        self.nx = max(1, int(space.width // cell_size))
+        self.ny = max(1, int(space.height // cell_size))
+        self.cell_width = space.width / self.nx
+        self.cell_height = space.height / self.ny
+        # Neighboring cell offsets along each axis; on a torus narrower than 3
+        # cells, -1 and +1 may designate the same cell, which must be searched
+        # only once.
+        if space.torus:
+            self.x_offsets = sorted({d % self.nx for d in (-1, 0, 1)})
+            self.y_offsets = sorted({d % self.ny for d in (-1, 0, 1)})
+        else:
+            self.x_offsets = self.y_offsets = [-1, 0, 1]
+        self.agents = []
+        self.positions = np.empty((0, 2))
+        self.order = np.empty(0, dtype=np.int64)
+        self.starts = np.zeros(self.nx * self.ny + 1, dtype=np.int64)
+
+    def cell_coords(self, positions):
+        """Return the integer (cx, cy) cell coordinates of positions."""
+        positions = np.asarray(positions, dtype=float)
+        cx = ((positions[..., 0] - self.space.x_min) // self.cell_width).astype(int)
+        cy = ((positions[..., 1] - self.space.y_min) // self.cell_height).astype(int)
+        return np.clip(cx, 0, self.nx - 1), np.clip(cy, 0, self.ny - 1)
+
+    def rebuild(self, agents, positions=None):
+        """Index agents, at their current positions unless positions are given.
+
+        Args:
+            agents: Sequence of agents with a pos attribute.
+            positions: Optional (N, 2) array of the agents' positions.
+        """
+        self.agents = list(agents)
+        if positions is None:
+            positions = np.array([agent.pos for agent in self.agents], dtype=float)
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        cx, cy = self.cell_coords(self.positions)
+        cells = cx * self.ny + cy
+        # Sort the agents by cell: the agents of cell c are then
+        # order[starts[c]:starts[c + 1]].
+        self.order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=self.nx * self.ny)
+        self.starts = np.concatenate([[0], np.cumsum(counts)])
+
+    def neighbor_cells(self, cx, cy):
+        """Return the ids of the cells in the 3x3 block around (cx, cy)."""
+        cells = []
+        for dx in self.x_offsets:
+            x = cx + dx
+            if self.space.torus:
+                x %= self.nx
+            elif not 0 <= x < self.nx:
+                continue
+            for dy in self.y_offsets:
+                y = cy + dy
+                if self.space.torus:
+                    y %= self.ny
+                elif not 0 <= y < self.ny:
+                    continue
+                cells.append(x * self.ny + y)
+        return cells
+
+    def candidates(self, pos):
+        """Return the indices of the agents in the cells around pos."""
+        cx, cy = self.cell_coords(pos)
+        slices = [
+            self.order[self.starts[cell] : self.starts[cell + 1]]
+            for cell in self.neighbor_cells(int(cx), int(cy))
+        ]
+        return np.concatenate(slices)
+
+    def pairs(self, radius, k=None, rows=None, one_way=False):
+        """Find every pair of indexed agents within radius of each other.
+
+        Distances are measured between the positions the index was built
+        with, and, as with get_neighbors(pos, radius, False), agents at the
+        exact same position are not paired.
+
+        Args:
+            radius: Largest distance between paired agents.
+            k: If given, only pair each agent with (at most) its k nearest
+                agents within radius.
+            rows: If given, a slice of the indexed agents: only find the pairs
+                (i, j) with i in rows.
+            one_way: If True, only return each pair once, as (i, j) with
+                i < j. Ignored if k is given, which is not symmetric.
+
+        Returns:
+            (i, j, deltas): Indices into the indexed agents of each ordered
+            pair (both (i, j) and (j, i) are included, unless one_way is set),
+            and the (P, 2) array of displacements from agent i to agent j.
+        """
+        n = len(self.positions)
+        queries = np.arange(n)[rows] if rows is not None else np.arange(n)
+        cx, cy = self.cell_coords(self.positions[queries])
+        # The first occupant and the number of occupants of each cell around
+        # each agent, as (agents, cells) arrays.
+        firsts, counts = [], []
+        for dx in self.x_offsets:
+            x = cx + dx
+            for dy in self.y_offsets:
+                y = cy + dy
+                if self.space.torus:
+                    valid = np.ones(len(queries), dtype=bool)
+                    cells = (x % self.nx) * self.ny + y % self.ny
+                else:
+                    valid = (x >= 0) & (x < self.nx) & (y >= 0) & (y < self.ny)
+                    cells = np.where(valid, x * self.ny + y, 0)
+                firsts.append(self.starts[cells])
+                counts.append(
+                    np.where(valid, self.starts[cells + 1] - self.starts[cells], 0)
+                )
+        firsts = np.stack(firsts, axis=1).ravel()
+        counts = np.stack(counts, axis=1)
+        # Pair each agent with every occupant of its cells: repeat the agent
+        # once per occupant, and enumerate the occupants of its cells in turn,
+        # so that the pairs are grouped by agent.
+        i = np.repeat(queries, counts.sum(axis=1))
+        counts = counts.ravel()
+        rank = np.arange(len(i)) - np.repeat(np.cumsum(counts) - counts, counts)
+        j = self.order[np.repeat(firsts, counts) + rank]
+        if one_way and k is None:
+            i, j = i[i < j], j[i < j]
+        deltas = displacement(self.space, self.positions[i], self.positions[j])
+        dists = deltas[:, 0] ** 2 + deltas[:, 1] ** 2
+        (close,) = np.nonzero((dists <= radius**2) & (dists > 0))
+        if k is not None:
+            close = close[k_nearest_pairs(i[close], dists[close], k, n)]
+        i, j, deltas = i[close], j[close], deltas[close]
+        return i, j, deltas
+
+    def get_neighbors(self, pos, radius, include_center=True, k=None):
+        """Get all the indexed agents within radius of pos.
+
+        Same as ContinuousSpace.get_neighbors, but only searches the cells
+        around pos. radius must not exceed the radius the index was built for.
+        If k is given, only the (at most) k agents nearest to pos are returned.
+        """
+        agents = [self.agents[i] for i in self.candidates(pos)]
+        if not agents:
+            return []
+        points = np.array([agent.pos for agent in agents], dtype=float)
+        deltas = np.abs(points - np.asarray(pos, dtype=float))
+        if self.space.torus:
+            deltas = np.minimum(deltas, self.space.size - deltas)
+        dists = deltas[:, 0] ** 2 + deltas[:, 1] ** 2
+        within = dists <= radius**2
+        if not include_center:
+            within &= dists > 0
+        (idxs,) = np.nonzero(within)
+        if k is not None and len(idxs) > k:
+            # Partial selection of the k nearest, without sorting the rest.
+            idxs = idxs[np.argpartition(dists[idxs], k - 1)[:k]]
+        return [agents[i] for i in idxs]
@@ -9,6 +9,32 @@ const ContinuousVisualization = function(width, height, context) {
 
 	};
 
+	// Draw count agents, all with the same portrayal, from a Float32Array
+	// holding stride values per agent: x, y and, if stride is 3, the heading.
+	this.drawPacked = function(style, records, count, stride) {
+		for (let i = 0; i < count; i++) {
+			const x = records[i * stride];
+			const y = records[i * stride + 1];
+			if (style.Shape == "rect")
+				this.drawRectange(x, y, style.w, style.h, style.Color, style.Filled);
+			if (style.Shape == "circle")
+				this.drawCircle(x, y, style.r, style.Color, style.Filled);
+			if (stride > 2)
+				this.drawHeading(x, y, records[i * stride + 2], 2 * (style.r || 2), style.Color);
+		}
+	};
+
+	this.drawHeading = function(x, y, angle, length, color) {
+		const cx = x * width;
+		const cy = y * height;
+
+		context.beginPath();
+		context.moveTo(cx, cy);
+		context.lineTo(cx + length * Math.cos(angle), cy + length * Math.sin(angle));
+		context.strokeStyle = color;
+		context.stroke();
+	};
+
 	this.drawCircle = function(x, y, radius, color, fill) {
 		const cx = x * width;
 		const cy = y * height;
@@ -67,10 +93,25 @@ const Simple_Continuous_Module = function(canvas_width, canvas_height) {
 	// Create the context and the drawing controller:
 	const context = canvas.getContext("2d");
 	const canvasDraw = new ContinuousVisualization(canvas_width, canvas_height, context);
+	// Portrayal shared by all the agents, sent with the first binary frame.
+	let style = null;
+
+	// Decode a base64 string of little-endian float32 values.
+	const decodeFloat32 = function(encoded) {
+		const bytes = Uint8Array.from(atob(encoded), c => c.charCodeAt(0));
+		return new Float32Array(bytes.buffer);
+	};
 
 	this.render = function(data) {
 		canvasDraw.resetCanvas();
-		canvasDraw.draw(data);
+		if (Array.isArray(data)) {
+			canvasDraw.draw(data);
+			return;
+		}
+		if (data.style)
+			style = data.style;
+		if (style)
+			canvasDraw.drawPacked(style, decodeFloat32(data.buffer), data.count, data.stride);
 	};
 
 	this.reset = function() {
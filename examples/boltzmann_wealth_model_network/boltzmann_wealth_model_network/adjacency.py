@@ -0,0 +1,142 @@
+"""
+Array-backed network grid.
+
+mesa.space.NetworkGrid answers every neighborhood query through networkx's
+dict-of-dicts: listing a node's neighbors, checking whether each of them is
+empty, and gathering their agents. CSRNetworkGrid takes a snapshot of the
+graph's adjacency in compressed sparse row (CSR) form, where the neighbors
+of node i are indices[indptr[i]:indptr[i + 1]], and keeps the number of
+agents on each node in an occupancy array, so that these queries become
+array slices.
+"""
+
+import mesa
+import networkx as nx
+import numpy as np
+
+
+def csr_adjacency(num_nodes, edges):
+    """Return the (indptr, indices) CSR adjacency of an undirected graph.
+
+    Args:
+        num_nodes: Number of nodes, labelled 0 to num_nodes - 1.
+        edges: (E, 2) array of the edges, each listed once.
+
+    Returns:
+        indptr, indices: The neighbors of node i, in increasing order, are
+            indices[indptr[i]:indptr[i + 1]].
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    sources = np.concatenate([edges[:, 0], edges[:, 1]])
+    targets = np.concatenate([edges[:, 1], edges[:, 0]])
+    # Rows sorted by neighbor, for a deterministic order: sorting the pairs
+    # as single keys is much faster than np.lexsort.
+    keys = sources * num_nodes + targets
+    keys.sort()
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+    return indptr, keys % num_nodes
+
+
+class CSRNetworkGrid(mesa.space.NetworkGrid):
+    """
+    A NetworkGrid answering neighborhood queries from arrays.
+
+    The nodes must be labelled 0 to n - 1, as with networkx's generators,
+    and the graph's edges must not change once the grid is created (call
+    refresh() after changing them). The grid is made from a networkx graph,
+    or from an array of edges, in which case the networkx graph G is only
+    built when first used, e.g. for visualization. The agents on each node
+    are listed in G.nodes[node]["agent"].
+
+    Attributes:
+        edges: (E, 2) array of the edges.
+        indptr, indices: CSR adjacency of the graph.
+        occupancy: Number of agents on each node.
+    """
+
+    def __init__(self, G=None, num_nodes=None, edges=None):
+        """
+        Args:
+            G: networkx graph, or None to give num_nodes and edges instead.
+            num_nodes: Number of nodes.
+            edges: (E, 2) array of the edges, each listed once.
+        """
+        if G is not None:
+            num_nodes = G.number_of_nodes()
+            if set(G) != set(range(num_nodes)):
+                raise ValueError("The nodes must be labelled 0 to n - 1.")
+        elif num_nodes is None or edges is None:
+            raise ValueError("Give either G, or num_nodes and edges.")
+        self._cells = [[] for _ in range(num_nodes)]
+        self.occupancy = np.zeros(num_nodes, dtype=np.int64)
+        self._G = None
+        if G is not None:
+            self._attach(G)
+            self.refresh()
+        else:
+            self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+            self.indptr, self.indices = csr_adjacency(num_nodes, self.edges)
+
+    @property
+    def G(self):
+        """The networkx graph, built from the edges on first use."""
+        if self._G is None:
+            G = nx.Graph()
+            G.add_nodes_from(range(len(self._cells)))
+            G.add_edges_from(self.edges.tolist())
+            self._attach(G)
+        return self._G
+
+    def _attach(self, G):
+        """List the agents on each node in G's node attributes."""
+        for node_id in G.nodes:
+            G.nodes[node_id]["agent"] = self._cells[node_id]
+        self._G = G
+
+    def refresh(self):
+        """Take a new snapshot of the graph's adjacency."""
+        self.edges = np.array(self.G.edges, dtype=np.int64).reshape(-1, 2)
+        self.indptr, self.indices = csr_adjacency(len(self._cells), self.edges)
+
+    def place_agent(self, agent, node_id):
+        """Place a agent in a node."""
+        self._cells[node_id].append(agent)
+        self.occupancy[node_id] += 1
+        agent.pos = node_id
+
+    def remove_agent(self, agent):
+        """Remove the agent from the network and set its pos attribute to None."""
+        node_id = agent.pos
+        self._cells[node_id].remove(agent)
+        self.occupancy[node_id] -= 1
+        agent.pos = None
+
+    def neighbor_nodes(self, node_id):
+        """Return the array of the nodes adjacent to node_id (a view)."""
+        return self.indices[self.indptr[node_id] : self.indptr[node_id + 1]]
+
+    def empty_neighbors(self, node_id):
+        """Return the array of the empty nodes adjacent to node_id."""
+        nodes = self.neighbor_nodes(node_id)
+        return nodes[self.occupancy[nodes] == 0]
+
+    def neighbor_agents(self, node_id):
+        """Return the list of the agents on the nodes adjacent to node_id."""
+        nodes = self.neighbor_nodes(node_id)
+        return self.get_cell_list_contents(nodes[self.occupancy[nodes] > 0])
+
+    def get_neighbors(self, node_id, include_center=False):
+        """Get all adjacent nodes"""
+        neighbors = self.neighbor_nodes(node_id).tolist()
+        if include_center:
+            neighbors.append(node_id)
+        return neighbors
+
+    def is_cell_empty(self, node_id):
+        """Returns a bool of the contents of a cell."""
+        return self.occupancy[node_id] == 0
+
+    def iter_cell_list_contents(self, cell_list):
+        """Returns a list of the agents on the nodes in cell_list."""
+        return [agent for node_id in cell_list for agent in self._cells[node_id]]
@@ -0,0 +1,151 @@
+"""
+Citation:
+The following code is a copy from columns.py in the Boltzmann_Wealth_Model
+example (Boltzmann_Wealth_Model/boltzmann_wealth_model/columns.py).
+Columnar storage for agent variables.
+
+mesa.DataCollector stores agent variables as one Python tuple of (step, agent
+id, values...) per agent per step, which costs around a hundred bytes per
+value. For a fixed population of agents, a variable over time is simply a
+(steps, agents) array: AgentVariableStore preallocates one, with a fixed
+dtype, and doubles its number of rows when it is full, so that an int32
+variable takes 4 bytes per value. ColumnarDataCollector is a DataCollector
+storing its agent variables that way.
+"""
+
+import mesa
+import numpy as np
+import pandas as pd
+
+
+class AgentVariableStore:
+    """
+    The values of one variable of a fixed set of agents, step by step.
+
+    Attributes:
+        values: (steps, agents) view of the values recorded so far.
+    """
+
+    def __init__(self, num_agents, dtype=np.int32, initial_steps=256):
+        """
+        Args:
+            num_agents: Number of agents (columns).
+            dtype: NumPy dtype of the values.
+            initial_steps: Number of steps (rows) to allocate at first; it
+                doubles as needed.
+        """
+        self._data = np.empty((max(initial_steps, 1), num_agents), dtype=dtype)
+        self.steps = 0
+
+    def append(self, values):
+        """Record the values of all the agents for one more step."""
+        if self.steps == len(self._data):
+            grown = np.empty(
+                (2 * len(self._data), self._data.shape[1]),
+                dtype=self._data.dtype,
+            )
+            grown[: self.steps] = self._data
+            self._data = grown
+        self._data[self.steps] = values
+        self.steps += 1
+
+    @property
+    def values(self):
+        return self._data[: self.steps]
+
+    def to_dataframe(self, agent_ids=None):
+        """Return a (steps, agents) DataFrame over the values, without copying."""
+        return pd.DataFrame(
+            self.values,
+            columns=(
+                pd.Index(agent_ids, name="AgentID") if agent_ids is not None else None
+            ),
+            copy=False,
+        ).rename_axis("Step")
+
+    def save(self, path):
+        """Write the values to a .npy file."""
+        np.save(path, self.values)
+
+
+class ColumnarDataCollector(mesa.DataCollector):
+    """
+    A DataCollector storing agent variables in AgentVariableStores.
+
+    Agent reporters are attribute names or functions of an agent, as for
+    mesa.DataCollector. The population must stay the same from one collect()
+    to the next: the agents' unique ids are recorded at the first one, and
+    checked at every other.
+    """
+
+    def __init__(
+        self,
+        model_reporters=None,
+        agent_reporters=None,
+        tables=None,
+        dtypes=None,
+        initial_steps=256,
+    ):
+        """
+        Args:
+            model_reporters, tables: As for mesa.DataCollector.
+            agent_reporters: Dictionary of reporter names and attributes/funcs.
+            dtypes: Dictionary of reporter names to dtypes (default int32).
+            initial_steps: Number of steps to allocate storage for at first.
+        """
+        super().__init__(model_reporters=model_reporters, tables=tables)
+        self.agent_columns = dict(agent_reporters or {})
+        self.dtypes = dict(dtypes or {})
+        self.initial_steps = initial_steps
+        self.agent_ids = None
+        self.agent_steps = []
+        self.stores = {}
+
+    def collect(self, model):
+        super().collect(model)
+        if not self.agent_columns:
+            return
+        agents = model.schedule.agents
+        agent_ids = np.array([agent.unique_id for agent in agents])
+        if self.agent_ids is None:
+            self.agent_ids = agent_ids
+            self.stores = {
+                name: AgentVariableStore(
+                    len(agents), self.dtypes.get(name, np.int32), self.initial_steps
+                )
+                for name in self.agent_columns
+            }
+        elif not np.array_equal(agent_ids, self.agent_ids):
+            # The stores' columns are the agents of the first collect, in order.
+            raise ValueError("The population changed between two collects.")
+        for name, reporter in self.agent_columns.items():
+            if isinstance(reporter, str):
+                values = [getattr(agent, reporter) for agent in agents]
+            else:
+                values = [reporter(agent) for agent in agents]
+            self.stores[name].append(values)
+        self.agent_steps.append(model.schedule.steps)
+
+    def get_agent_vars_array(self, name):
+        """Return the (steps, agents) array of a variable, without copying."""
+        return self.stores[name].values
+
+    def get_agent_vars_dataframe(self):
+        """Create a pandas DataFrame from the agent variables.
+
+        Same layout as mesa.DataCollector's, indexed by Step and AgentID; this
+        builds a copy in long format, use get_agent_vars_array() or the stores'
+        to_dataframe() to avoid it.
+        """
+        index = pd.MultiIndex.from_product(
+            [self.agent_steps, self.agent_ids if self.agent_ids is not None else []],
+            names=["Step", "AgentID"],
+        )
+        return pd.DataFrame(
+            {name: store.values.ravel() for name, store in self.stores.items()},
+            index=index,
+        )
+
+    def save_agent_vars(self, name, path):
+        """Write the (steps, agents) values of a variable to a .npy file."""
+        self.stores[name].save(path)
@@ -0,0 +1,260 @@
+"""
+Random graph generators emitting edge arrays.
+
+networkx's generators build the graph edge by edge into dicts, and
+erdos_renyi_graph tests every pair of nodes, which takes hours for a million
+nodes. These draw the same families of graphs as (E, 2) arrays of edges
+between nodes 0 to n - 1, each edge listed once, with a handful of array
+operations, for CSRNetworkGrid to use directly.
+"""
+
+import numpy as np
+
+# Largest number of node pairs for which gnm_edges enumerates them all.
+MAX_ENUMERATED_PAIRS = 10**7
+# Largest number of edges that watts_strogatz_edges rewires one at a time,
+# and number of rounds of redrawing rewired edges together, for more edges,
+# before falling back to rewiring them one at a time.
+MAX_SEQUENTIAL_REWIRING = 10**4
+MAX_REWIRING_ROUNDS = 32
+
+
+def _pair_keys(edges, n):
+    """Return a key identifying each edge regardless of its direction."""
+    return np.minimum(edges[:, 0], edges[:, 1]) * n + np.maximum(
+        edges[:, 0], edges[:, 1]
+    )
+
+
+def gnm_edges(n, m, rng):
+    """Return the edges of a uniform random graph with n nodes and m edges.
+
+    As networkx.gnm_random_graph. Sparse graphs are drawn by rejection:
+    random pairs of nodes are drawn until there are m distinct ones.
+    """
+    num_pairs = n * (n - 1) // 2
+    if m > num_pairs:
+        raise ValueError(f"A graph with {n} nodes has at most {num_pairs} edges.")
+    if num_pairs <= MAX_ENUMERATED_PAIRS:
+        sources, targets = np.triu_indices(n, 1)
+        chosen = rng.choice(num_pairs, m, replace=False)
+        return np.stack([sources[chosen], targets[chosen]], axis=1)
+    keys = np.zeros(0, dtype=np.int64)
+    while len(keys) < m:
+        # Draw a little more than is missing, to rarely need another round.
+        size = int((m - len(keys)) * 1.1) + 16
+        pairs = rng.integers(n, size=(size, 2))
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        keys = np.concatenate([keys, _pair_keys(pairs, n)])
+        keys.sort()
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+    # The distinct pairs drawn are a uniform random set; keep m of them.
+    keys = keys[rng.choice(len(keys), m, replace=False)]
+    return np.stack([keys // n, keys % n], axis=1)
+
+
+def gnp_edges(n, p, rng):
+    """Return the edges of a random graph where each edge exists with prob. p.
+
+    As networkx.erdos_renyi_graph. The number of edges of a G(n, p) graph is
+    binomial, and given it the graph is a uniform G(n, m) one.
+    """
+    m = rng.binomial(n * (n - 1) // 2, p)
+    return gnm_edges(n, m, rng)
+
+
+def barabasi_albert_edges(n, m, rng):
+    """Return the edges of a Barabasi-Albert preferential attachment graph.
+
+    As networkx.barabasi_albert_graph: starting from a star of m + 1 nodes,
+    each new node attaches to m distinct existing nodes, drawn with
+    probability proportional to their degree. Every edge endpoint listed so
+    far is an equally likely pick, so all the picks are drawn at once as
+    positions in the list of endpoints, which are then resolved together
+    (Batagelj and Brandes, 2005).
+    """
+    if m < 1 or m >= n:
+        raise ValueError("Barabasi-Albert network must have m >= 1 and m < n.")
+    star = np.stack([np.zeros(m, dtype=np.int64), np.arange(1, m + 1)], axis=1)
+    new_nodes = n - m - 1
+    # Each new node t picks among the endpoints of the star and of the edges
+    # of the new nodes before it.
+    bounds = 2 * m + 2 * m * np.arange(new_nodes)
+    targets = np.empty((new_nodes, m), dtype=np.int64)
+    # The picks of the new nodes are drawn in blocks of doubling size, and
+    # resolved a window of nodes at a time. As in networkx, the picks of a
+    # node already picked by the same new node (mostly by the first new
+    # nodes) are drawn again, keeping the first. A node's picks are only
+    # checked once the nodes they resolve through are final, that is come
+    # before the first node with a repeated pick (until then a pick may only
+    # seem repeated); the next window starts from that node, and is sized
+    # from the distance to it.
+    picks = np.empty((new_nodes, m), dtype=np.int64)
+    start = drawn = 0
+    window = 64
+    while start < new_nodes:
+        if start == drawn:
+            drawn = min(new_nodes, max(2 * start, 64))
+            picks[start:drawn] = (
+                rng.random((drawn - start, m)) * bounds[start:drawn, None]
+            ).astype(np.int64)
+        stop = min(drawn, start + window)
+        block, via = _resolve_endpoints(
+            picks[start:stop], star.ravel(), targets[:start].ravel(), m
+        )
+        targets[start:stop] = block
+        order = np.argsort(block, axis=1, kind="stable")
+        ordered = np.take_along_axis(block, order, axis=1)
+        repeated = np.zeros(block.shape, dtype=bool)
+        repeated[:, 1:] = ordered[:, 1:] == ordered[:, :-1]
+        with_repeats = np.flatnonzero(repeated.any(axis=1))
+        if not len(with_repeats):
+            start = stop
+            window *= 2
+            continue
+        first = with_repeats[0]
+        repeated &= (via.max(axis=1) < first)[:, None]
+        rows, columns = np.nonzero(repeated)
+        rows += start
+        picks[rows, order[rows - start, columns]] = (
+            rng.random(len(rows)) * bounds[rows]
+        ).astype(np.int64)
+        start += first
+        window = max(64, 2 * first)
+    sources = np.repeat(np.arange(m + 1, n), m)
+    return np.concatenate([star, np.stack([sources, targets.ravel()], axis=1)])
+
+
+def _resolve_endpoints(picks, initial, known, m):
+    """Return the node at each position picked in the list of endpoints.
+
+    The list starts with the initial endpoints, followed by the source and
+    the target of every new edge in turn. A pick of a target is the known
+    target of an earlier block's edge, or the node that edge's own pick
+    resolves to, always an earlier edge of the block.
+
+    Args:
+        picks: (nodes, m) picks of a block of new nodes.
+        initial: Endpoints of the initial graph.
+        known: Targets of the edges of the new nodes before the block.
+        m: Number of edges per new node.
+
+    Returns:
+        nodes, via: (nodes, m) arrays of the node of each pick, and of the
+            last node of the block whose picks it resolved through (-1 if
+            none).
+    """
+    flat_picks = picks.ravel()
+    position = flat_picks.copy()
+    nodes = np.empty_like(position)
+    via = np.full_like(position, -1)
+    pending = np.arange(len(position))
+    while len(pending):
+        current = position[pending]
+        in_initial = current < len(initial)
+        nodes[pending[in_initial]] = initial[current[in_initial]]
+        edge, is_target = np.divmod(current - len(initial), 2)
+        is_source = ~in_initial & (is_target == 0)
+        nodes[pending[is_source]] = m + 1 + edge[is_source] // m
+        is_known = ~in_initial & (is_target == 1) & (edge < len(known))
+        nodes[pending[is_known]] = known[edge[is_known]]
+        chase = ~in_initial & (is_target == 1) & (edge >= len(known))
+        chased = edge[chase] - len(known)
+        position[pending[chase]] = flat_picks[chased]
+        via[pending[chase]] = np.maximum(via[pending[chase]], chased // m)
+        pending = pending[chase]
+    return nodes.reshape(picks.shape), via.reshape(picks.shape)
+
+
+def watts_strogatz_edges(n, k, p, rng):
+    """Return the edges of a Watts-Strogatz small-world graph.
+
+    As networkx.watts_strogatz_graph: a ring where each node is joined to
+    its k nearest neighbors, each edge (u, v) then being rewired with
+    probability p to (u, w), with w a random node other than u and not
+    already joined to it. Small graphs are rewired one edge at a time, as
+    networkx does. In larger ones, the rewired edges are drawn together, and
+    those making a self-loop or a duplicate edge are drawn again, for a few
+    rounds; if some are still left, as can happen in dense graphs, the edges
+    are rewired one at a time after all.
+    """
+    if k > n:
+        raise ValueError("k > n, choose smaller k or larger n")
+    if k >= n - 1:
+        sources, targets = np.triu_indices(n, 1)
+        return np.stack([sources, targets], axis=1)
+    offsets = np.arange(1, k // 2 + 1)
+    sources = np.repeat(np.arange(n), len(offsets))
+    targets = (sources + np.tile(offsets, n)) % n
+    ring = np.stack([sources, targets], axis=1)
+    (rewired,) = np.nonzero(rng.random(len(ring)) < p)
+    if len(ring) <= MAX_SEQUENTIAL_REWIRING:
+        return _rewire_one_by_one(ring, rewired, n, rng)
+    edges = ring.copy()
+    pending = rewired
+    for _ in range(MAX_REWIRING_ROUNDS):
+        if not len(pending):
+            return edges
+        edges[pending, 1] = rng.integers(n, size=len(pending))
+        _, inverse, counts = np.unique(
+            _pair_keys(edges, n), return_inverse=True, return_counts=True
+        )
+        duplicate = counts[inverse[pending]] > 1
+        pending = pending[duplicate | (edges[pending, 0] == edges[pending, 1])]
+    return _rewire_one_by_one(ring, rewired, n, rng)
+
+
+def _rewire_one_by_one(ring, rewired, n, rng):
+    """Rewire the ring's rewired edges in turn, as networkx does.
+
+    The edges are taken in networkx's order, by offset and then by node; an
+    edge whose source is already joined to every other node is kept.
+    """
+    edges = ring.copy()
+    neighbors = [set() for _ in range(n)]
+    for u, v in edges.tolist():
+        neighbors[u].add(v)
+        neighbors[v].add(u)
+    per_node = len(ring) // n
+    for edge in sorted(rewired.tolist(), key=lambda e: (e % per_node, e)):
+        u, v = edges[edge].tolist()
+        if len(neighbors[u]) >= n - 1:
+            continue
+        w = u
+        while w == u or w in neighbors[u]:
+            w = int(rng.integers(n))
+        neighbors[u].remove(v)
+        neighbors[v].remove(u)
+        neighbors[u].add(w)
+        neighbors[w].add(u)
+        edges[edge, 1] = w
+    return edges
+
+
+GENERATORS = {
+    "gnp": lambda n, rng, p, m, k: gnp_edges(n, p, rng),
+    "gnm": lambda n, rng, p, m, k: gnm_edges(n, m, rng),
+    "barabasi_albert": lambda n, rng, p, m, k: barabasi_albert_edges(n, m, rng),
+    "watts_strogatz": lambda n, rng, p, m, k: watts_strogatz_edges(n, k, p, rng),
+}
+
+
+def generate_edges(graph, n, rng, p=0.5, m=None, k=4):
+    """Return the edges of a random graph of the given kind.
+
+    Args:
+        graph: One of GENERATORS' keys: "gnp", "gnm", "barabasi_albert" or
+            "watts_strogatz".
+        n: Number of nodes.
+        rng: NumPy random Generator.
+        p, m, k: Parameters of the generator, named as in networkx: the edge
+            probability (gnp) or rewiring probability (watts_strogatz), the
+            number of edges (gnm) or of edges per new node (barabasi_albert),
+            and the number of ring neighbors (watts_strogatz). m has no
+            default.
+    """
+    if graph not in GENERATORS:
+        raise ValueError(f"Unknown graph {graph!r}, choose from {list(GENERATORS)}.")
+    if m is None and graph in ("gnm", "barabasi_albert"):
+        raise ValueError(f"The {graph} graph needs m.")
+    return GENERATORS[graph](n, rng, p, m, k)
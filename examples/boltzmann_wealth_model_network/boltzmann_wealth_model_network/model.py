@@ -1,31 +1,61 @@
 import mesa
-import networkx as nx
+import numpy as np
+
+from .adjacency import CSRNetworkGrid
+from .columns import ColumnarDataCollector
+from .generators import generate_edges
+from .wealth import WealthHistogram
 
 
 def compute_gini(model):
-    agent_wealths = [agent.wealth for agent in model.schedule.agents]
-    x = sorted(agent_wealths)
-    N = model.num_agents
-    B = sum(xi * (N - i) for i, xi in enumerate(x)) / (N * sum(x))
-    return 1 + (1 / N) - 2 * B
+    return model.wealth_histogram.gini()
 
 
 class BoltzmannWealthModelNetwork(mesa.Model):
     """A model with some number of agents."""
 
-    def __init__(self, num_agents=7, num_nodes=10):
+    def __init__(self, num_agents=7, num_nodes=10, graph="gnp", p=0.5, m=2, k=4):
+        """
+        Args:
+            num_agents: Number of agents.
+            num_nodes: Number of nodes, at least num_agents.
+            graph: Kind of random graph: "gnp", "gnm", "barabasi_albert" or
+                "watts_strogatz" (see generators.py).
+            p: Edge probability (gnp) or rewiring probability
+                (watts_strogatz).
+            m: Number of edges (gnm) or of edges per new node
+                (barabasi_albert), at most the number the graph can have.
+            k: Number of ring neighbors of each node (watts_strogatz), at most
+                num_nodes - 1.
+        """
 
         self.num_agents = num_agents
         self.num_nodes = num_nodes if num_nodes >= self.num_agents else self.num_agents
-        self.G = nx.erdos_renyi_graph(n=self.num_nodes, p=0.5)
-        self.grid = mesa.space.NetworkGrid(self.G)
+        # Clamp m and k to the number of nodes, as num_nodes to num_agents,
+        # so that every combination of the server's sliders is valid.
+        if graph == "gnm":
+            m = min(m, self.num_nodes * (self.num_nodes - 1) // 2)
+        elif graph == "barabasi_albert":
+            m = max(1, min(m, self.num_nodes - 1))
+        k = min(k, self.num_nodes - 1)
+        # NumPy stream seeded from the model's RNG, so that runs stay
+        # reproducible with the model seed.
+        self.rng = np.random.default_rng(self.random.getrandbits(64))
+        if self.num_nodes > 1:
+            edges = generate_edges(graph, self.num_nodes, self.rng, p=p, m=m, k=k)
+        else:
+            # A single node, which no generator needs to connect.
+            edges = np.zeros((0, 2), dtype=np.int64)
+        self.grid = CSRNetworkGrid(num_nodes=self.num_nodes, edges=edges)
         self.schedule = mesa.time.RandomActivation(self)
-        self.datacollector = mesa.DataCollector(
+        self.datacollector = ColumnarDataCollector(
             model_reporters={"Gini": compute_gini},
             agent_reporters={"Wealth": lambda _: _.wealth},
         )
 
-        list_of_random_nodes = self.random.sample(list(self.G), self.num_agents)
+        list_of_random_nodes = self.random.sample(
+            range(self.num_nodes), self.num_agents
+        )
 
         # Create agents
         for i in range(self.num_agents):
@@ -34,9 +64,19 @@ class BoltzmannWealthModelNetwork(mesa.Model):
             # Add the agent to a random node
             self.grid.place_agent(a, list_of_random_nodes[i])
 
+        # Kept up to date by MoneyAgent.give_money, for compute_gini.
+        self.wealth_histogram = WealthHistogram(
+            [agent.wealth for agent in self.schedule.agents]
+        )
+
         self.running = True
         self.datacollector.collect(self)
 
+    @property
+    def G(self):
+        """The networkx graph, built on first use (for visualization)."""
+        return self.grid.G
+
     def step(self):
         self.schedule.step()
         # collect data
@@ -55,22 +95,18 @@ class MoneyAgent(mesa.Agent):
         self.wealth = 1
 
     def move(self):
-        possible_steps = [
-            node
-            for node in self.model.grid.get_neighbors(self.pos, include_center=False)
-            if self.model.grid.is_cell_empty(node)
-        ]
+        possible_steps = self.model.grid.empty_neighbors(self.pos)
         if len(possible_steps) > 0:
-            new_position = self.random.choice(possible_steps)
+            new_position = int(self.random.choice(possible_steps))
             self.model.grid.move_agent(self, new_position)
 
     def give_money(self):
-
-        neighbors_nodes = self.model.grid.get_neighbors(self.pos, include_center=False)
-        neighbors = self.model.grid.get_cell_list_contents(neighbors_nodes)
+        neighbors = self.model.grid.neighbor_agents(self.pos)
         if len(neighbors) > 0:
             other = self.random.choice(neighbors)
+            self.model.wealth_histogram.move(other.wealth, other.wealth + 1)
             other.wealth += 1
+            self.model.wealth_histogram.move(self.wealth, self.wealth - 1)
             self.wealth -= 1
 
     def step(self):
@@ -50,6 +50,18 @@ model_params = {
         description="Choose how many nodes to include in the model, with at "
         "least the same number of agents",
     ),
+    "graph": mesa.visualization.Choice(
+        "Random graph",
+        value="gnp",
+        choices=["gnp", "gnm", "barabasi_albert", "watts_strogatz"],
+    ),
+    "p": mesa.visualization.Slider(
+        "Edge (gnp) or rewiring (watts_strogatz) probability", 0.5, 0, 1, 0.05
+    ),
+    "m": mesa.visualization.Slider(
+        "Edges (gnm) or edges per new node (barabasi_albert)", 2, 1, 20, 1
+    ),
+    "k": mesa.visualization.Slider("Ring neighbors (watts_strogatz)", 4, 2, 10, 2),
 }
 
 server = mesa.visualization.ModularServer(
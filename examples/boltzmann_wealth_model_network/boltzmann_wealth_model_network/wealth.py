@@ -0,0 +1,74 @@
+"""
+Citation:
+The following code is a copy from wealth.py in the Boltzmann_Wealth_Model
+example (Boltzmann_Wealth_Model/boltzmann_wealth_model/wealth.py).
+Gini coefficient of the agents' wealth.
+
+Sorting every agent's wealth to compute the Gini coefficient costs
+O(N log N) per step. Wealth is a small non-negative integer, so the model
+instead keeps a histogram of the agents' wealth, updated on every transfer,
+and computes the Gini coefficient from it in O(max wealth). gini() computes it
+from an array of values, for reporters which do not have a histogram.
+"""
+
+import numpy as np
+
+
+def gini(values):
+    """Return the Gini coefficient of an array of non-negative values.
+
+    Uses the sorted values as
+        G = 2 * sum(i * x_i) / (N * sum(x)) - (N + 1) / N,
+    with ranks i starting from 1.
+    """
+    x = np.sort(np.asarray(values, dtype=float).ravel())
+    n = len(x)
+    total = x.sum()
+    if n == 0 or total == 0:
+        return 0.0
+    ranks = np.arange(1, n + 1)
+    return float(2 * (ranks * x).sum() / (n * total) - (n + 1) / n)
+
+
+class WealthHistogram:
+    """
+    Counts of the agents with each amount of wealth.
+
+    Attributes:
+        counts: Array with counts[w] the number of agents with wealth w; it
+            grows as wealthier agents appear.
+    """
+
+    def __init__(self, wealths=()):
+        wealths = np.asarray(wealths, dtype=np.int64)
+        self.counts = np.bincount(wealths, minlength=16)
+
+    def add(self, wealth, count=1):
+        """Add count agents with the given wealth (remove them if negative)."""
+        if wealth >= len(self.counts):
+            grown = np.zeros(max(wealth + 1, 2 * len(self.counts)), dtype=np.int64)
+            grown[: len(self.counts)] = self.counts
+            self.counts = grown
+        self.counts[wealth] += count
+
+    def move(self, old, new):
+        """Record that an agent's wealth went from old to new."""
+        self.add(old, -1)
+        self.add(new, 1)
+
+    def gini(self):
+        """Return the Gini coefficient of the wealth, as gini() would.
+
+        The ranks of the agents with wealth w are consecutive, so the sum over
+        the agents becomes a sum over the bins of the histogram.
+        """
+        counts = self.counts
+        wealths = np.arange(len(counts))
+        n = counts.sum()
+        total = (counts * wealths).sum()
+        if n == 0 or total == 0:
+            return 0.0
+        rank_end = np.cumsum(counts)
+        rank_start = rank_end - counts
+        rank_sums = counts * rank_start + counts * (counts + 1) // 2
+        return float(2 * (wealths * rank_sums).sum() / (n * total) - (n + 1) / n)
@@ -9,6 +9,8 @@ Author of NetLogo code:
     Northwestern University, Evanston, IL.
 """
 
+import functools
+
 import mesa
 import numpy as np
 
@@ -22,61 +24,137 @@ For details see batch_run.py in the same directory as run.py.
 # Start of datacollector functions
 
 
+def compute_financial_report(model):
+    """return all the financial aggregates of the people, in one pass over them
+
+    Use get_financial_report(), which computes them once per step.
+    """
+
+    rich_threshold = model.rich_threshold
+    rich = poor = mid = 0
+    savings, wallets, loans = [], [], []
+    for a in model.schedule.agents:
+        agent_savings, agent_loans = a.savings, a.loans
+        savings.append(agent_savings)
+        wallets.append(a.wallet)
+        loans.append(agent_loans)
+        if agent_savings > rich_threshold:
+            rich += 1
+        if agent_loans > 10:
+            poor += 1
+        elif agent_loans < 10 and agent_savings < rich_threshold:
+            mid += 1
+    total_savings = np.sum(savings)
+    total_wallets = np.sum(wallets)
+    return {
+        "Rich": rich,
+        "Poor": poor,
+        "Middle Class": mid,
+        "Savings": total_savings,
+        "Wallets": total_wallets,
+        "Money": total_wallets + total_savings,
+        "Loans": np.sum(loans),
+    }
+
+
+# names of the aggregates of compute_financial_report()
+FINANCIAL_COLUMNS = [
+    "Rich",
+    "Poor",
+    "Middle Class",
+    "Savings",
+    "Wallets",
+    "Money",
+    "Loans",
+]
+
+
+def get_financial_report(model):
+    """return the financial aggregates of the people at the current step
+
+    During a collect() of a FinancialDataCollector, the report is computed
+    once and kept on the model, so that the reporters below, each taking one
+    of its aggregates, cost a single computation between them, in any order.
+    """
+
+    if not hasattr(model, "_financial_report"):
+        return compute_financial_report(model)
+    if model._financial_report is None:
+        model._financial_report = compute_financial_report(model)
+    return model._financial_report
+
+
+class FinancialDataCollector(mesa.DataCollector):
+    """
+    A DataCollector sharing one financial report between its reporters.
+
+    The people's accounts are plain attributes, which may change at any time,
+    so the report is only shared within a single collect().
+    """
+
+    def collect(self, model):
+        model._financial_report = None
+        try:
+            super().collect(model)
+        finally:
+            del model._financial_report
+
+
+def fan_out(report, columns):
+    """return a model reporter for each of the columns of report(model)
+
+    report should be cached, as get_financial_report() is.
+    """
+
+    return {
+        column: functools.partial(_report_column, report, column) for column in columns
+    }
+
+
+def _report_column(report, column, model):
+    return report(model)[column]
+
+
 def get_num_rich_agents(model):
     """return number of rich agents"""
 
-    rich_agents = [a for a in model.schedule.agents if a.savings > model.rich_threshold]
-    return len(rich_agents)
+    return get_financial_report(model)["Rich"]
 
 
 def get_num_poor_agents(model):
     """return number of poor agents"""
 
-    poor_agents = [a for a in model.schedule.agents if a.loans > 10]
-    return len(poor_agents)
+    return get_financial_report(model)["Poor"]
 
 
 def get_num_mid_agents(model):
     """return number of middle class agents"""
 
-    mid_agents = [
-        a
-        for a in model.schedule.agents
-        if a.loans < 10 and a.savings < model.rich_threshold
-    ]
-    return len(mid_agents)
+    return get_financial_report(model)["Middle Class"]
 
 
 def get_total_savings(model):
     """sum of all agents' savings"""
 
-    agent_savings = [a.savings for a in model.schedule.agents]
-    # return the sum of agents' savings
-    return np.sum(agent_savings)
+    return get_financial_report(model)["Savings"]
 
 
 def get_total_wallets(model):
     """sum of amounts of all agents' wallets"""
 
-    agent_wallets = [a.wallet for a in model.schedule.agents]
-    # return the sum of all agents' wallets
-    return np.sum(agent_wallets)
+    return get_financial_report(model)["Wallets"]
 
 
 def get_total_money(model):
-    # sum of all agents' wallets
-    wallet_money = get_total_wallets(model)
-    # sum of all agents' savings
-    savings_money = get_total_savings(model)
-    # return sum of agents' wallets and savings for total money
-    return wallet_money + savings_money
+    """sum of all agents' wallets and savings"""
+
+    return get_financial_report(model)["Money"]
 
 
 def get_total_loans(model):
-    # list of amounts of all agents' loans
-    agent_loans = [a.loans for a in model.schedule.agents]
-    # return sum of all agents' loans
-    return np.sum(agent_loans)
+    """sum of all agents' loans"""
+
+    return get_financial_report(model)["Loans"]
 
 
 class Charts(mesa.Model):
@@ -106,16 +184,8 @@ class Charts(mesa.Model):
         self.rich_threshold = rich_threshold
         self.reserve_percent = reserve_percent
         # see datacollector functions above
-        self.datacollector = mesa.DataCollector(
-            model_reporters={
-                "Rich": get_num_rich_agents,
-                "Poor": get_num_poor_agents,
-                "Middle Class": get_num_mid_agents,
-                "Savings": get_total_savings,
-                "Wallets": get_total_wallets,
-                "Money": get_total_money,
-                "Loans": get_total_loans,
-            },
+        self.datacollector = FinancialDataCollector(
+            model_reporters=fan_out(get_financial_report, FINANCIAL_COLUMNS),
             agent_reporters={"Wealth": lambda x: x.wealth},
         )
 
@@ -0,0 +1,89 @@
+"""
+Statistical comparison of sequential and batched ant movement.
+
+Runs independent replicates of SugarscapeCg under both activation regimes
+(RandomActivationByType, and the two-phase BatchedMovementActivation) and
+compares the population trajectories, the final population and the mean sugar
+held by the surviving ants, with a Welch t-test and a permutation test.
+
+    $ python compare_movement.py --replicates 50 --steps 100
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from sugarscape_cg.agents import SsAgent
+from sugarscape_cg.model import SugarscapeCg
+
+
+def run_replicates(batched_movement, replicates, steps):
+    """Return the (replicates, steps + 1) populations, final mean sugar and time."""
+    populations = np.zeros((replicates, steps + 1))
+    mean_sugar = np.zeros(replicates)
+    start = time.perf_counter()
+    for r in range(replicates):
+        model = SugarscapeCg(batched_movement=batched_movement)
+        model.verbose = False
+        model.run_model(step_count=steps)
+        populations[r] = model.datacollector.get_model_vars_dataframe()["SsAgent"]
+        agents = model.schedule.agents_by_type[SsAgent].values()
+        mean_sugar[r] = np.mean([agent.sugar for agent in agents])
+    return populations, mean_sugar, time.perf_counter() - start
+
+
+def welch_t(a, b):
+    """Welch's t statistic for the difference of the means of a and b."""
+    se = np.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b))
+    return (a.mean() - b.mean()) / se if se > 0 else 0.0
+
+
+def permutation_p(a, b, permutations=10000, seed=0):
+    """Two-sided permutation test p-value for the difference of the means."""
+    rng = np.random.default_rng(seed)
+    pooled = np.concatenate([a, b])
+    observed = abs(a.mean() - b.mean())
+    samples = np.array([rng.permutation(pooled) for _ in range(permutations)])
+    diffs = np.abs(
+        samples[:, : len(a)].mean(axis=1) - samples[:, len(a) :].mean(axis=1)
+    )
+    return (np.sum(diffs >= observed) + 1) / (permutations + 1)
+
+
+def compare(name, sequential, batched):
+    print(
+        f"{name:>18}: sequential {sequential.mean():8.2f} +/- {sequential.std(ddof=1):6.2f}"
+        f" | batched {batched.mean():8.2f} +/- {batched.std(ddof=1):6.2f}"
+        f" | Welch t {welch_t(sequential, batched):6.2f}"
+        f" | permutation p {permutation_p(sequential, batched):.3f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--replicates", type=int, default=30)
+    parser.add_argument("--steps", type=int, default=100)
+    args = parser.parse_args()
+
+    seq_pop, seq_sugar, seq_time = run_replicates(False, args.replicates, args.steps)
+    bat_pop, bat_sugar, bat_time = run_replicates(True, args.replicates, args.steps)
+
+    print(f"{args.replicates} replicates of {args.steps} steps per regime")
+    print(f"Run time: sequential {seq_time:.2f}s, batched {bat_time:.2f}s")
+    compare("Final population", seq_pop[:, -1], bat_pop[:, -1])
+    compare("Mean sugar", seq_sugar, bat_sugar)
+
+    # Largest gap between the mean population trajectories, relative to the
+    # standard error of the difference at that step.
+    se = np.sqrt(
+        seq_pop.var(axis=0, ddof=1) / args.replicates
+        + bat_pop.var(axis=0, ddof=1) / args.replicates
+    )
+    gap = np.abs(seq_pop.mean(axis=0) - bat_pop.mean(axis=0))
+    z = np.divide(gap, se, out=np.zeros_like(gap), where=se > 0)
+    step = int(z.argmax())
+    print(
+        f"Largest trajectory gap: {gap[step]:.2f} agents at step {step}"
+        f" ({z[step]:.2f} standard errors)"
+    )
@@ -0,0 +1,95 @@
+"""
+Run an ensemble of SugarscapeCg replicas in a process pool.
+
+The sugar capacity map and the vision tables are placed in shared memory once
+by this process, and the workers attach to them instead of loading their own
+copies (see sugarscape_cg/shared.py). Pass --private to have every worker load
+its own copies instead, to compare worker startup time and memory use.
+
+    $ python run_ensemble.py --replicas 32 --workers 8 --steps 100
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+
+import numpy as np
+
+from sugarscape_cg import shared
+from sugarscape_cg.agents import SsAgent
+from sugarscape_cg.landscape import load_sugar_map
+from sugarscape_cg.model import SugarscapeCg
+from sugarscape_cg.vision import vision_offsets
+
+
+def init_worker(handle, created):
+    """Attach to (or, when handle is None, load) the landscape arrays."""
+    global startup_time
+    if handle is not None:
+        shared.attach(handle)
+    else:
+        load_sugar_map()
+        for radius in range(6):
+            vision_offsets(radius, False)
+            vision_offsets(radius, True)
+    startup_time = time.perf_counter() - created
+
+
+def max_sugar():
+    try:
+        return shared.attached("max_sugar")
+    except KeyError:
+        return load_sugar_map()
+
+
+def run_replica(steps):
+    model = SugarscapeCg(max_sugar=max_sugar())
+    model.verbose = False
+    model.run_model(step_count=steps)
+    # ru_maxrss is in kilobytes on Linux.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return (
+        model.schedule.get_type_count(SsAgent),
+        os.getpid(),
+        startup_time,
+        peak_rss,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--replicas", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--private", action="store_true")
+    args = parser.parse_args()
+
+    landscape = None if args.private else shared.SharedLandscape()
+    handle = None if landscape is None else landscape.handle
+    try:
+        start = time.perf_counter()
+        with multiprocessing.Pool(
+            args.workers, initializer=init_worker, initargs=(handle, start)
+        ) as pool:
+            results = pool.map(run_replica, [args.steps] * args.replicas)
+        elapsed = time.perf_counter() - start
+    finally:
+        if landscape is not None:
+            landscape.close()
+
+    populations = np.array([r[0] for r in results])
+    workers = {pid: (startup, rss) for _, pid, startup, rss in results}
+    startups = np.array([startup for startup, _ in workers.values()])
+    rss = np.array([rss for _, rss in workers.values()])
+    print(
+        f"{args.replicas} replicas on {len(workers)} workers"
+        f" ({'private' if args.private else 'shared'} landscape): {elapsed:.2f}s"
+    )
+    print(f"Final population: {populations.mean():.2f} +/- {populations.std():.2f}")
+    print(f"Worker startup: mean {startups.mean() * 1000:.1f} ms")
+    print(
+        f"Worker peak RSS: mean {rss.mean() / 1024:.1f} MiB,"
+        f" total {rss.sum() / 1024:.1f} MiB"
+    )
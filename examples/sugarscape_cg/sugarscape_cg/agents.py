@@ -1,19 +1,6 @@
-import math
-
 import mesa
 
-
-def get_distance(pos_1, pos_2):
-    """Get the distance between two point
-
-    Args:
-        pos_1, pos_2: Coordinate tuples for both points.
-    """
-    x1, y1 = pos_1
-    x2, y2 = pos_2
-    dx = x1 - x2
-    dy = y1 - y2
-    return math.sqrt(dx**2 + dy**2)
+from .vision import vision_offsets
 
 
 class SsAgent(mesa.Agent):
@@ -27,57 +14,40 @@ class SsAgent(mesa.Agent):
         self.metabolism = metabolism
         self.vision = vision
 
-    def get_sugar(self, pos):
-        this_cell = self.model.grid.get_cell_list_contents([pos])
-        for agent in this_cell:
-            if type(agent) is Sugar:
-                return agent
-
-    def is_occupied(self, pos):
-        this_cell = self.model.grid.get_cell_list_contents([pos])
-        return any(isinstance(agent, SsAgent) for agent in this_cell)
-
     def move(self):
-        # Get neighborhood within vision
-        neighbors = [
-            i
-            for i in self.model.grid.get_neighborhood(
-                self.pos, self.moore, False, radius=self.vision
-            )
-            if not self.is_occupied(i)
-        ]
-        neighbors.append(self.pos)
+        # Get the cells within vision, nearest first, starting with our own
+        offsets, distances = vision_offsets(self.vision, self.moore)
+        grid = self.model.grid
+        x, y = self.pos
+        xs = offsets[:, 0] + x
+        ys = offsets[:, 1] + y
+        if grid.torus:
+            xs %= grid.width
+            ys %= grid.height
+        else:
+            on_grid = (xs >= 0) & (xs < grid.width) & (ys >= 0) & (ys < grid.height)
+            xs, ys, distances = xs[on_grid], ys[on_grid], distances[on_grid]
+        # Keep our own cell, and the unoccupied ones
+        free = self.model.occupancy[xs, ys] == 0
+        free[0] = True
+        xs, ys, distances = xs[free], ys[free], distances[free]
         # Look for location with the most sugar
-        max_sugar = max(self.get_sugar(pos).amount for pos in neighbors)
-        candidates = [
-            pos for pos in neighbors if self.get_sugar(pos).amount == max_sugar
-        ]
+        sugar = self.model.landscape.amount[xs, ys]
+        candidates = (sugar == sugar.max()).nonzero()[0]
         # Narrow down to the nearest ones
-        min_dist = min(get_distance(self.pos, pos) for pos in candidates)
-        final_candidates = [
-            pos for pos in candidates if get_distance(self.pos, pos) == min_dist
-        ]
-        self.random.shuffle(final_candidates)
-        self.model.grid.move_agent(self, final_candidates[0])
+        min_dist = distances[candidates[0]]
+        final_candidates = candidates[distances[candidates] == min_dist]
+        i = self.random.choice(final_candidates)
+        self.model.move_ssagent(self, (int(xs[i]), int(ys[i])))
 
     def eat(self):
-        sugar_patch = self.get_sugar(self.pos)
-        self.sugar = self.sugar - self.metabolism + sugar_patch.amount
-        sugar_patch.amount = 0
+        harvest = self.model.landscape.harvest(self.pos)
+        old_sugar = self.sugar
+        self.sugar = self.sugar - self.metabolism + harvest
+        self.model.statistics.update_sugar(old_sugar, self.sugar)
 
     def step(self):
         self.move()
         self.eat()
         if self.sugar <= 0:
-            self.model.grid.remove_agent(self)
-            self.model.schedule.remove(self)
-
-
-class Sugar(mesa.Agent):
-    def __init__(self, unique_id, pos, model, max_sugar):
-        super().__init__(unique_id, model)
-        self.amount = max_sugar
-        self.max_sugar = max_sugar
-
-    def step(self):
-        self.amount = min([self.max_sugar, self.amount + 1])
+            self.model.remove_ssagent(self)
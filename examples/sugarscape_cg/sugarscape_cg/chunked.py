@@ -0,0 +1,355 @@
+"""
+Lazily generated, chunked landscapes, for Sugarscapes far larger than the
+50x50 sugar-map.txt (e.g. 10,000x10,000 cells or more).
+
+A dense landscape of that size would take gigabytes, and so would the grid and
+the occupancy array of the model. Instead, the landscape is split in square
+chunks which are only generated when an ant looks at them, from a generator
+function such as gaussian_peaks() or tiled(). Chunks nobody has looked at for a
+while are evicted: a fully regrown chunk is simply dropped, as it can be
+generated again, and any other is reduced to its sugar deficit, stored as one
+byte per cell. Since growback is constant, the growth missed while a chunk was
+evicted is caught up exactly when it is next generated. Memory therefore scales
+with the area the ants can see, not with the nominal size of the grid.
+
+    landscape = ChunkedLandscape(10000, 10000, gaussian_peaks(10000, 10000))
+    model = SugarscapeCg(initial_population=10000, landscape=landscape)
+"""
+
+import collections
+
+import numpy as np
+
+
+class ChunkedArray:
+    """
+    A 2D array stored as lazily allocated square chunks.
+
+    Supports the indexing used on the landscape and occupancy arrays: a pair
+    of integers, or a pair of integer arrays of any (matching) shape.
+
+    Attributes:
+        chunks: Dictionary of (chunk x, chunk y) to the allocated chunks.
+        last_access: Dictionary of (chunk x, chunk y) to the value of clock
+                     when the chunk was last accessed.
+        clock: Current time, set by the owner of the array.
+    """
+
+    def __init__(self, shape, dtype, chunk_size=64, fill=None):
+        """
+        Create a new, empty chunked array.
+
+        Args:
+            shape: (width, height) of the array.
+            dtype: Type of the elements.
+            chunk_size: Side of the chunks, in cells.
+            fill: Function called as fill(x0, x1, y0, y1) to generate the
+                  contents of the block [x0:x1, y0:y1] when it is first
+                  accessed. If None, chunks start filled with zeros.
+        """
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+        self.fill = fill
+        self.chunks = {}
+        self.last_access = {}
+        self.clock = 0
+        # Number of chunks along y, to turn chunk coordinates into a single key.
+        self._ny = -(-shape[1] // chunk_size)
+
+    def bounds(self, key):
+        """Return the (x0, x1, y0, y1) block covered by the chunk at key."""
+        cx, cy = key
+        x0, y0 = cx * self.chunk_size, cy * self.chunk_size
+        x1 = min(x0 + self.chunk_size, self.shape[0])
+        y1 = min(y0 + self.chunk_size, self.shape[1])
+        return x0, x1, y0, y1
+
+    def new_chunk(self, key):
+        """Return the initial contents of the chunk at key."""
+        x0, x1, y0, y1 = self.bounds(key)
+        if self.fill is None:
+            return np.zeros((x1 - x0, y1 - y0), dtype=self.dtype)
+        return np.asarray(self.fill(x0, x1, y0, y1), dtype=self.dtype)
+
+    def chunk(self, key):
+        """Return the chunk at key, generating it if needed."""
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = self.new_chunk(key)
+        self.last_access[key] = self.clock
+        return chunk
+
+    def discard(self, key):
+        """Forget the chunk at key."""
+        del self.chunks[key]
+        del self.last_access[key]
+
+    def idle_chunks(self, since):
+        """Return the keys of the chunks not accessed since the given time."""
+        return [key for key, time in self.last_access.items() if time < since]
+
+    def _groups(self, xs, ys):
+        """Split the flat index arrays xs, ys by chunk.
+
+        Yields (chunk, positions, local x, local y) for every chunk involved,
+        where positions are the indices of its elements in xs and ys.
+        """
+        size = self.chunk_size
+        cx0, cx1 = int(xs.min()) // size, int(xs.max()) // size
+        cy0, cy1 = int(ys.min()) // size, int(ys.max()) // size
+        if cx0 == cx1 and cy0 == cy1:
+            # Usual case, e.g. the vision of a single ant.
+            chunk = self.chunk((cx0, cy0))
+            yield chunk, slice(None), xs - cx0 * size, ys - cy0 * size
+            return
+        cx, lx = np.divmod(xs, size)
+        cy, ly = np.divmod(ys, size)
+        keys = cx * self._ny + cy
+        order = np.argsort(keys, kind="stable")
+        starts = np.flatnonzero(np.diff(keys[order], prepend=-1))
+        ends = np.append(starts[1:], keys.size)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            positions = order[start:end]
+            key = divmod(int(keys[positions[0]]), self._ny)
+            yield self.chunk(key), positions, lx[positions], ly[positions]
+
+    def __getitem__(self, index):
+        xs, ys = index
+        if not isinstance(xs, np.ndarray) and not isinstance(ys, np.ndarray):
+            cx, lx = divmod(int(xs), self.chunk_size)
+            cy, ly = divmod(int(ys), self.chunk_size)
+            return self.chunk((cx, cy))[lx, ly]
+        xs, ys = np.broadcast_arrays(xs, ys)
+        out = np.empty(xs.size, dtype=self.dtype)
+        if xs.size:
+            for chunk, positions, lx, ly in self._groups(xs.ravel(), ys.ravel()):
+                out[positions] = chunk[lx, ly]
+        return out.reshape(xs.shape)
+
+    def __setitem__(self, index, value):
+        xs, ys = index
+        if not isinstance(xs, np.ndarray) and not isinstance(ys, np.ndarray):
+            cx, lx = divmod(int(xs), self.chunk_size)
+            cy, ly = divmod(int(ys), self.chunk_size)
+            self.chunk((cx, cy))[lx, ly] = value
+            return
+        xs, ys = np.broadcast_arrays(xs, ys)
+        values = np.broadcast_to(np.asarray(value, dtype=self.dtype), xs.shape).ravel()
+        if xs.size:
+            for chunk, positions, lx, ly in self._groups(xs.ravel(), ys.ravel()):
+                chunk[lx, ly] = values[positions]
+
+
+class _SugarAmount(ChunkedArray):
+    """Current sugar of a ChunkedLandscape, restored from evicted deficits."""
+
+    def __init__(self, landscape):
+        super().__init__(
+            landscape.max_sugar.shape,
+            landscape.max_sugar.dtype,
+            landscape.max_sugar.chunk_size,
+        )
+        self.landscape = landscape
+
+    def new_chunk(self, key):
+        capacity = self.landscape.max_sugar.chunk(key)
+        evicted = self.landscape.evicted.pop(key, None)
+        if evicted is None:
+            return capacity.copy()
+        deficit, evicted_at = evicted
+        # Catch up with the growth missed while the chunk was evicted.
+        missed = self.clock - evicted_at
+        remaining = np.clip(deficit.astype(np.int64) - missed, 0, None)
+        return (capacity - remaining).astype(self.dtype)
+
+
+class ChunkedLandscape:
+    """
+    A sugar landscape generated chunk by chunk, as ants look at it.
+
+    It offers the same interface as SugarLandscape (max_sugar and amount
+    indexed as [x, y], harvest() and step()), so that SugarscapeCg and its
+    schedulers can use either.
+
+    Attributes:
+        max_sugar: ChunkedArray of the sugar capacity of every cell.
+        amount: ChunkedArray of the sugar currently available on every cell.
+        evicted: Dictionary of chunk keys to (deficit, time of eviction), for
+                 the evicted chunks which had not fully regrown.
+    """
+
+    def __init__(self, width, height, generator, chunk_size=64, idle_steps=20):
+        """
+        Create a new chunked landscape, with every cell at full capacity.
+
+        Args:
+            width, height: Size of the landscape.
+            generator: Function called as generator(x0, x1, y0, y1), returning
+                       the sugar capacities of the block [x0:x1, y0:y1].
+                       Capacities must be integers from 0 to 255.
+            chunk_size: Side of the chunks, in cells.
+            idle_steps: Number of steps after which a chunk nobody looked at
+                        is evicted.
+        """
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.idle_steps = idle_steps
+        self.time = 0
+        self.max_sugar = ChunkedArray(
+            (width, height), np.uint8, chunk_size, fill=generator
+        )
+        self.amount = _SugarAmount(self)
+        self.evicted = {}
+        self.layers = []
+
+    def new_layer(self, dtype):
+        """Return a zero-filled ChunkedArray with the same chunks.
+
+        Chunks of the layer which are idle and back to zero are discarded when
+        the landscape steps. The model uses this for its occupancy array.
+        """
+        layer = ChunkedArray((self.width, self.height), dtype, self.chunk_size)
+        self.layers.append(layer)
+        return layer
+
+    def harvest(self, pos):
+        """Remove all the sugar on the cell at pos, and return how much it was."""
+        amount = self.amount[pos].item()
+        self.amount[pos] = 0
+        return amount
+
+    def step(self):
+        """Grow back one unit of sugar on every generated cell, up to its
+        capacity, and evict the chunks which have been idle for too long."""
+        for key, chunk in self.amount.chunks.items():
+            capacity = self.max_sugar.chunks[key]
+            np.add(chunk, 1, out=chunk, where=chunk < capacity)
+
+        self.time += 1
+        since = self.time - self.idle_steps
+        for key in self.amount.idle_chunks(since):
+            deficit = self.max_sugar.chunks[key] - self.amount.chunks[key]
+            if deficit.any():
+                self.evicted[key] = (deficit, self.time)
+            self.amount.discard(key)
+        for key in self.max_sugar.idle_chunks(since):
+            if key not in self.amount.chunks:
+                self.max_sugar.discard(key)
+        # Deficits which have been caught up by growback are no longer needed.
+        for key, (deficit, evicted_at) in list(self.evicted.items()):
+            if self.time - evicted_at >= deficit.max():
+                del self.evicted[key]
+
+        for layer in [self.amount, self.max_sugar] + self.layers:
+            layer.clock = self.time
+        for layer in self.layers:
+            for key in layer.idle_chunks(since):
+                if not layer.chunks[key].any():
+                    layer.discard(key)
+
+    def memory_usage(self):
+        """Return the number of bytes held by generated and evicted chunks."""
+        layers = [self.amount, self.max_sugar] + self.layers
+        held = sum(c.nbytes for layer in layers for c in layer.chunks.values())
+        return held + sum(deficit.nbytes for deficit, _ in self.evicted.values())
+
+
+def gaussian_peaks(width, height, peaks=None, sigma=12.0, max_sugar=4, seed=None):
+    """Return a generator of sugar hills around randomly placed peaks.
+
+    The capacity of a cell is max_sugar times the sum of Gaussians centered on
+    the peaks (capped at 1), rounded to the nearest integer, which resembles
+    the two hills of sugar-map.txt.
+
+    Args:
+        width, height: Size of the landscape.
+        peaks: Number of peaks. Defaults to two per 50x50 area, as in
+               sugar-map.txt.
+        sigma: Standard deviation of the Gaussians, in cells.
+        max_sugar: Capacity at the top of a peak.
+        seed: Seed for the placement of the peaks.
+    """
+    rng = np.random.default_rng(seed)
+    if peaks is None:
+        peaks = max(1, round(2 * width * height / 2500))
+    centers = rng.random((peaks, 2)) * (width, height)
+    # Beyond this distance a peak adds less than 1/16 unit of sugar, so only
+    # the peaks in nearby buckets are summed.
+    reach = sigma * np.sqrt(2 * np.log(16 * max_sugar))
+    buckets = collections.defaultdict(list)
+    for i, (px, py) in enumerate(centers):
+        buckets[int(px // reach), int(py // reach)].append(i)
+
+    def generate(x0, x1, y0, y1):
+        nearby = [
+            i
+            for bx in range(int((x0 - reach) // reach), int((x1 + reach) // reach) + 1)
+            for by in range(int((y0 - reach) // reach), int((y1 + reach) // reach) + 1)
+            for i in buckets.get((bx, by), ())
+        ]
+        xs = np.arange(x0, x1)[:, None, None]
+        ys = np.arange(y0, y1)[None, :, None]
+        px, py = centers[nearby, 0], centers[nearby, 1]
+        hills = np.exp(-((xs - px) ** 2 + (ys - py) ** 2) / (2 * sigma**2))
+        hills = np.minimum(hills.sum(axis=2), 1)
+        return np.rint(max_sugar * hills).astype(np.uint8)
+
+    return generate
+
+
+def tiled(tile):
+    """Return a generator repeating the capacity map tile in both directions.
+
+    Args:
+        tile: Array of sugar capacities indexed as [x, y], e.g. from
+              load_sugar_map().
+    """
+    tile = np.rint(tile).astype(np.uint8)
+    tile_w, tile_h = tile.shape
+
+    def generate(x0, x1, y0, y1):
+        return tile[np.ix_(np.arange(x0, x1) % tile_w, np.arange(y0, y1) % tile_h)]
+
+    return generate
+
+
+class SparseMultiGrid:
+    """
+    A MultiGrid which only stores the occupied cells, for landscapes too large
+    for mesa.space.MultiGrid to allocate a list per cell.
+
+    Supports the part of the MultiGrid interface used by the Sugarscape.
+    """
+
+    def __init__(self, width, height, torus):
+        self.width = width
+        self.height = height
+        self.torus = torus
+        self.cells = {}
+
+    def place_agent(self, agent, pos):
+        self.cells.setdefault(pos, []).append(agent)
+        agent.pos = pos
+
+    def remove_agent(self, agent):
+        cell = self.cells[agent.pos]
+        cell.remove(agent)
+        if not cell:
+            del self.cells[agent.pos]
+        agent.pos = None
+
+    def move_agent(self, agent, pos):
+        self.remove_agent(agent)
+        self.place_agent(agent, pos)
+
+    def get_cell_list_contents(self, cell_list):
+        return [agent for pos in cell_list for agent in self.cells.get(pos, ())]
+
+    def is_cell_empty(self, pos):
+        return pos not in self.cells
+
+    def out_of_bounds(self, pos):
+        x, y = pos
+        return x < 0 or x >= self.width or y < 0 or y >= self.height
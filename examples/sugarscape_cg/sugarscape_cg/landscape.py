@@ -0,0 +1,106 @@
+"""
+Sugar landscape: loading of sugar capacity maps, and the sugar layer itself.
+
+Parsing sugar-map.txt with np.genfromtxt is slow, and doing it on every model
+instantiation adds up quickly over a batch run. The parsed map is therefore
+cached as a binary .npy file in the __pycache__ directory next to the text map,
+keyed by the map's absolute path and modification time. Models receive a
+read-only memory-mapped view of the cache, so every model in a batch (and every
+process on the machine) shares a single page-cache copy of the map.
+"""
+
+import glob
+import hashlib
+import os
+
+import numpy as np
+
+SUGAR_MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sugar-map.txt")
+
+
+def _cache_path(path):
+    """Return the .npy cache location for the text map at path.
+
+    The cache name includes a hash of the absolute path and the modification
+    time, so editing the map (or pointing at another one) invalidates it.
+    """
+    path = os.path.abspath(path)
+    key = f"{path}:{os.stat(path).st_mtime_ns}".encode()
+    digest = hashlib.sha1(key).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(path), "__pycache__", f"{stem}.{digest}.npy")
+
+
+def _write_cache(cache, sugar_map):
+    """Atomically write sugar_map to cache and drop stale caches of the same map."""
+    directory = os.path.dirname(cache)
+    os.makedirs(directory, exist_ok=True)
+    # Write to a private file first, so that concurrent workers never load a
+    # partially written cache.
+    tmp = f"{cache}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, sugar_map)
+    os.replace(tmp, cache)
+
+    # Strip only the trailing .<digest>.npy: the map's own name may contain
+    # dots (sugar-map.v2.txt), and must not match another map's caches.
+    stem = os.path.basename(cache).rsplit(".", 2)[0]
+    for stale in glob.glob(os.path.join(directory, f"{glob.escape(stem)}.*.npy")):
+        if stale != cache and os.path.basename(stale).rsplit(".", 2)[0] == stem:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def load_sugar_map(path=SUGAR_MAP):
+    """Load a sugar capacity map as a read-only array indexed as [x, y].
+
+    Args:
+        path: Path to a whitespace separated text map. Defaults to the
+              sugar-map.txt shipped with this package, independently of the
+              current working directory.
+    """
+    cache = _cache_path(path)
+    if not os.path.exists(cache):
+        sugar_map = np.genfromtxt(path)
+        try:
+            _write_cache(cache, sugar_map)
+        except OSError:
+            # Read-only install: fall back to the parsed array.
+            sugar_map.setflags(write=False)
+            return sugar_map
+    return np.load(cache, mmap_mode="r")
+
+
+class SugarLandscape:
+    """
+    The sugar layer of the Sugarscape, held as NumPy arrays indexed as [x, y]
+    instead of as one Sugar agent per cell.
+
+    Attributes:
+        max_sugar: Read-only array with the sugar capacity of every cell.
+        amount: Array with the sugar currently available on every cell.
+    """
+
+    def __init__(self, max_sugar):
+        """
+        Create a new landscape, with every cell at full capacity.
+
+        Args:
+            max_sugar: Array of sugar capacities, e.g. from load_sugar_map().
+        """
+        self.max_sugar = max_sugar
+        self.amount = np.array(max_sugar)
+        self.width, self.height = self.amount.shape
+
+    def harvest(self, pos):
+        """Remove all the sugar on the cell at pos, and return how much it was."""
+        amount = self.amount[pos]
+        self.amount[pos] = 0
+        return amount
+
+    def step(self):
+        """Grow back one unit of sugar on every cell, up to its capacity."""
+        self.amount += 1
+        np.minimum(self.amount, self.max_sugar, out=self.amount)
@@ -10,8 +10,14 @@ Northwestern University, Evanston, IL.
 """
 
 import mesa
+import numpy as np
 
-from .agents import SsAgent, Sugar
+from .agents import SsAgent
+from .chunked import ChunkedLandscape, SparseMultiGrid
+from .landscape import SugarLandscape, load_sugar_map
+from .metrics import ConsoleSummarySink
+from .schedule import BatchedMovementActivation
+from .statistics import PopulationStatistics
 
 
 class SugarscapeCg(mesa.Model):
@@ -21,38 +27,84 @@ class SugarscapeCg(mesa.Model):
 
     verbose = True  # Print-monitoring
 
-    def __init__(self, width=50, height=50, initial_population=100):
+    def __init__(
+        self,
+        width=50,
+        height=50,
+        initial_population=100,
+        batched_movement=False,
+        max_sugar=None,
+        metrics_sink=None,
+        landscape=None,
+    ):
         """
         Create a new Constant Growback model with the given parameters.
 
         Args:
+            width, height: Size of the grid, ignored if landscape is given.
             initial_population: Number of population to start with
+            batched_movement: If True, move all the ants at once from the same
+                              snapshot, resolving conflicts at random (see
+                              BatchedMovementActivation), instead of one at a
+                              time.
+            max_sugar: Array of the sugar capacity of every cell, of shape
+                       (width, height). Defaults to the map in sugar-map.txt.
+                       The array is only read, so it may be shared between
+                       models (see shared.py).
+            metrics_sink: MetricsSink to emit the counters of every step into.
+                          If None and verbose is set, a ConsoleSummarySink is
+                          used.
+            landscape: Sugar landscape to use instead of one made from
+                       max_sugar, e.g. a ChunkedLandscape for landscapes
+                       too large to hold in memory.
         """
 
+        # Create sugar
+        if landscape is None:
+            if max_sugar is None:
+                max_sugar = load_sugar_map()
+            landscape = SugarLandscape(max_sugar)
+            landscape_size = (width, height)
+        else:
+            landscape_size = (landscape.width, landscape.height)
+        self.landscape = landscape
+
         # Set parameters
-        self.width = width
-        self.height = height
+        self.width, self.height = landscape_size
         self.initial_population = initial_population
-
-        self.schedule = mesa.time.RandomActivationByType(self)
-        self.grid = mesa.space.MultiGrid(self.width, self.height, torus=False)
+        self.batched_movement = batched_movement
+        self.metrics_sink = metrics_sink
+
+        if self.batched_movement:
+            self.schedule = BatchedMovementActivation(self)
+        else:
+            self.schedule = mesa.time.RandomActivationByType(self)
+        if isinstance(self.landscape, ChunkedLandscape):
+            # A MultiGrid of this size would not fit in memory.
+            self.grid = SparseMultiGrid(self.width, self.height, torus=False)
+        else:
+            self.grid = mesa.space.MultiGrid(self.width, self.height, torus=False)
+        self.statistics = PopulationStatistics()
         self.datacollector = mesa.DataCollector(
-            {"SsAgent": lambda m: m.schedule.get_type_count(SsAgent)}
+            {
+                "SsAgent": lambda m: m.schedule.get_type_count(SsAgent),
+                "Gini": lambda m: m.statistics.gini(),
+            },
+            tables={
+                "Vision": ["Step", "Vision", "Count"],
+                "Metabolism": ["Step", "Metabolism", "Count"],
+            },
         )
 
-        # Create sugar
-        import numpy as np
-
-        sugar_distribution = np.genfromtxt("sugarscape_cg/sugar-map.txt")
-        agent_id = 0
-        for _, x, y in self.grid.coord_iter():
-            max_sugar = sugar_distribution[x, y]
-            sugar = Sugar(agent_id, (x, y), self, max_sugar)
-            agent_id += 1
-            self.grid.place_agent(sugar, (x, y))
-            self.schedule.add(sugar)
+        # Number of SsAgents on each cell, so that ants can check which cells
+        # are free without searching the grid.
+        if isinstance(self.landscape, ChunkedLandscape):
+            self.occupancy = self.landscape.new_layer(np.int32)
+        else:
+            self.occupancy = np.zeros((self.width, self.height), dtype=np.int32)
 
         # Create agent:
+        agent_id = 0
         for i in range(self.initial_population):
             x = self.random.randrange(self.width)
             y = self.random.randrange(self.height)
@@ -61,18 +113,60 @@ class SugarscapeCg(mesa.Model):
             vision = self.random.randrange(1, 6)
             ssa = SsAgent(agent_id, (x, y), self, False, sugar, metabolism, vision)
             agent_id += 1
-            self.grid.place_agent(ssa, (x, y))
-            self.schedule.add(ssa)
+            self.place_ssagent(ssa, (x, y))
 
         self.running = True
-        self.datacollector.collect(self)
+        self.collect()
+
+    def place_ssagent(self, agent, pos):
+        self.grid.place_agent(agent, pos)
+        self.schedule.add(agent)
+        self.occupancy[pos] += 1
+        self.statistics.add(agent)
+
+    def move_ssagent(self, agent, pos):
+        self.occupancy[agent.pos] -= 1
+        self.grid.move_agent(agent, pos)
+        self.occupancy[pos] += 1
+
+    def remove_ssagent(self, agent):
+        self.occupancy[agent.pos] -= 1
+        self.grid.remove_agent(agent)
+        self.schedule.remove(agent)
+        self.statistics.remove(agent)
 
     def step(self):
         self.schedule.step()
+        self.landscape.step()
         # collect data
+        self.collect()
+        self.emit_metrics()
+
+    def collect(self):
+        """Collect the model reporters, and the vision and metabolism
+        histograms, from the incrementally maintained statistics."""
         self.datacollector.collect(self)
-        if self.verbose:
-            print([self.schedule.time, self.schedule.get_type_count(SsAgent)])
+        step = self.schedule.time
+        for name, histogram in [
+            ("Vision", self.statistics.vision),
+            ("Metabolism", self.statistics.metabolism),
+        ]:
+            for value, count in enumerate(histogram.counts.tolist()):
+                if count:
+                    self.datacollector.add_table_row(
+                        name, {"Step": step, name: value, "Count": count}
+                    )
+
+    def emit_metrics(self):
+        """Emit the counters just collected by the datacollector into the sink."""
+        if self.metrics_sink is None:
+            if not self.verbose:
+                return
+            self.metrics_sink = ConsoleSummarySink()
+        counters = {
+            name: values[-1] for name, values in self.datacollector.model_vars.items()
+        }
+        self.metrics_sink.emit(self.schedule.time, counters)
 
     def run_model(self, step_count=200):
 
@@ -85,6 +179,9 @@ class SugarscapeCg(mesa.Model):
         for i in range(step_count):
             self.step()
 
+        if self.metrics_sink is not None:
+            self.metrics_sink.flush()
+
         if self.verbose:
             print("")
             print(
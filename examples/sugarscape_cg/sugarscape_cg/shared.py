@@ -0,0 +1,108 @@
+"""
+Shared-memory landscape for parallel Sugarscape ensembles.
+
+When many SugarscapeCg replicas run in a process pool, every worker would
+otherwise load its own copy of the sugar capacity map and compute its own
+vision tables. Instead, the parent process places these read-only arrays in
+multiprocessing.shared_memory once, and the workers attach to them without
+copying:
+
+    with SharedLandscape() as shared:
+        with multiprocessing.Pool(initializer=attach, initargs=(shared.handle,)):
+            ...
+
+In the workers, attached("max_sugar") is then the capacity map to pass to
+SugarscapeCg, and vision_offsets() serves the shared tables. Only each
+replica's current sugar amounts, which it mutates, are private.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .landscape import load_sugar_map
+from .vision import install_vision_offsets, vision_offsets
+
+# Shared blocks attached by this process, which must stay referenced for as
+# long as arrays built on them are in use.
+_blocks = []
+_arrays = {}
+
+
+class SharedLandscape:
+    """
+    Owner of the shared-memory copies of the landscape arrays.
+
+    The blocks are freed by close(), or when leaving the with block.
+
+    Attributes:
+        handle: Picklable description of the shared arrays, to pass to attach()
+                in the workers.
+    """
+
+    def __init__(self, max_sugar=None, max_vision=5):
+        """
+        Copy the landscape arrays into shared memory.
+
+        Args:
+            max_sugar: Array of sugar capacities. Defaults to load_sugar_map().
+            max_vision: Largest vision radius to share the tables of.
+        """
+        if max_sugar is None:
+            max_sugar = load_sugar_map()
+        arrays = {"max_sugar": max_sugar}
+        for radius in range(max_vision + 1):
+            for moore in (False, True):
+                offsets, distances = vision_offsets(radius, moore)
+                arrays[f"offsets_{radius}_{moore}"] = offsets
+                arrays[f"distances_{radius}_{moore}"] = distances
+
+        self.max_vision = max_vision
+        self.blocks = []
+        self.handle = {"max_vision": max_vision, "arrays": {}}
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.handle["arrays"][name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        """Release and destroy the shared blocks."""
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach(handle):
+    """Attach to the arrays described by handle, for use in this process.
+
+    Suitable as a multiprocessing.Pool initializer. Installs the shared vision
+    tables, so that vision_offsets() returns them from now on.
+    """
+    for name, (block_name, shape, dtype) in handle["arrays"].items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _blocks.append(block)
+        array = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        array.setflags(write=False)
+        _arrays[name] = array
+
+    for radius in range(handle["max_vision"] + 1):
+        for moore in (False, True):
+            install_vision_offsets(
+                radius,
+                moore,
+                _arrays[f"offsets_{radius}_{moore}"],
+                _arrays[f"distances_{radius}_{moore}"],
+            )
+
+
+def attached(name):
+    """Return the shared array called name, after attach() has been called."""
+    return _arrays[name]
@@ -0,0 +1,102 @@
+"""
+Incrementally maintained distribution statistics of the Sugarscape ants.
+
+Computing the Gini coefficient of the ants' sugar, or histograms of their
+vision and metabolism, with a pass over schedule.agents on every step gets
+expensive for large populations. Instead, PopulationStatistics keeps binned
+counts of these quantities, updated as ants are created, eat and die, so that
+the per-step distribution metrics only cost a pass over the bins.
+"""
+
+import numpy as np
+
+
+class Histogram:
+    """
+    Counts of non-negative integer values, growing as larger values are added.
+
+    Values are rounded to the nearest integer, and negative values (the sugar
+    of an ant in the moment before it dies) are counted as 0.
+    """
+
+    def __init__(self, size=16):
+        self._counts = np.zeros(size, dtype=np.int64)
+
+    @staticmethod
+    def bins(values):
+        return np.clip(np.rint(values), 0, None).astype(np.int64)
+
+    def add(self, values, weight=1):
+        """Add (or, with a negative weight, remove) a value or array of values."""
+        bins = self.bins(values)
+        top = int(bins.max(initial=0)) + 1
+        if top > len(self._counts):
+            grown = np.zeros(max(top, 2 * len(self._counts)), dtype=np.int64)
+            grown[: len(self._counts)] = self._counts
+            self._counts = grown
+        if bins.ndim == 0:
+            self._counts[bins] += weight
+        else:
+            self._counts[:top] += weight * np.bincount(bins, minlength=top)
+
+    def move(self, old, new):
+        """Move values from old to new, e.g. when ants eat."""
+        self.add(old, -1)
+        self.add(new, 1)
+
+    @property
+    def counts(self):
+        """Array of counts, with counts[v] the number of values equal to v."""
+        nonzero = np.flatnonzero(self._counts)
+        top = nonzero[-1] + 1 if nonzero.size else 0
+        return self._counts[:top].copy()
+
+
+class PopulationStatistics:
+    """
+    Distributions of the ants' sugar, vision and metabolism.
+
+    The model calls add() and remove() when ants are created and die, and
+    update_sugar() when they eat.
+
+    Attributes:
+        sugar, vision, metabolism: Histogram of each quantity.
+    """
+
+    def __init__(self):
+        self.sugar = Histogram(64)
+        self.vision = Histogram()
+        self.metabolism = Histogram()
+
+    def add(self, agent):
+        self.sugar.add(agent.sugar)
+        self.vision.add(agent.vision)
+        self.metabolism.add(agent.metabolism)
+
+    def remove(self, agent):
+        self.sugar.add(agent.sugar, -1)
+        self.vision.add(agent.vision, -1)
+        self.metabolism.add(agent.metabolism, -1)
+
+    def update_sugar(self, old, new):
+        """Record that ants' sugar went from old to new (scalars or arrays)."""
+        self.sugar.move(old, new)
+
+    def gini(self):
+        """Return the Gini coefficient of the ants' sugar.
+
+        Computed from the sorted values as
+            G = 2 * sum(i * x_i) / (n * sum(x)) - (n + 1) / n,
+        where the ranks i of the values in bin v are consecutive, so that the
+        sum runs over the bins instead of over the ants.
+        """
+        counts = self.sugar.counts
+        values = np.arange(len(counts))
+        n = counts.sum()
+        total = (counts * values).sum()
+        if n == 0 or total == 0:
+            return 0.0
+        rank_end = np.cumsum(counts)
+        rank_start = rank_end - counts
+        rank_sums = counts * rank_start + counts * (counts + 1) // 2
+        return float(2 * (values * rank_sums).sum() / (n * total) - (n + 1) / n)
@@ -0,0 +1,57 @@
+"""
+Precomputed vision tables for the Sugarscape ants.
+
+Every ant looks at the same pattern of cells around itself, which only depends
+on its vision radius. Rather than asking the grid for the neighborhood of every
+ant on every step, the relative offsets of that pattern are computed once per
+radius, sorted by distance, and shifted to the ant's position.
+"""
+
+import numpy as np
+
+# Tables computed (or installed) so far, keyed by (radius, moore).
+_tables = {}
+
+
+def vision_offsets(radius, moore=False):
+    """Return the cells visible within radius, relative to the viewer.
+
+    Args:
+        radius: Vision radius, in cells.
+        moore: If True, see the whole square around the viewer. Otherwise, see
+               the von Neumann neighborhood (Manhattan distance <= radius).
+
+    Returns:
+        A tuple (offsets, distances): an int array of shape (K, 2) of (dx, dy)
+        offsets and the matching Euclidean distances, sorted by increasing
+        distance. The first offset is always (0, 0). Both arrays are read-only,
+        as they are shared by every caller.
+    """
+    key = (radius, bool(moore))
+    if key not in _tables:
+        _tables[key] = _compute_offsets(radius, moore)
+    return _tables[key]
+
+
+def install_vision_offsets(radius, moore, offsets, distances):
+    """Use the given arrays as the table for (radius, moore) in this process.
+
+    This lets worker processes use tables placed in shared memory by their
+    parent (see shared.py) instead of computing private copies.
+    """
+    _tables[(radius, bool(moore))] = (offsets, distances)
+
+
+def _compute_offsets(radius, moore):
+    steps = np.arange(-radius, radius + 1)
+    dx, dy = (a.ravel() for a in np.meshgrid(steps, steps, indexing="ij"))
+    if not moore:
+        in_sight = np.abs(dx) + np.abs(dy) <= radius
+        dx, dy = dx[in_sight], dy[in_sight]
+    distances = np.hypot(dx, dy)
+    order = np.argsort(distances, kind="stable")
+    offsets = np.stack([dx[order], dy[order]], axis=1)
+    distances = distances[order]
+    offsets.setflags(write=False)
+    distances.setflags(write=False)
+    return offsets, distances
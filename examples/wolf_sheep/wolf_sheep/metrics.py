@@ -0,0 +1,117 @@
+"""
+Metrics sinks for per-step monitoring.
+
+Printing to stdout on every step is a synchronous write to a terminal or log
+pipe, which easily costs more than the step itself for small models and floods
+batch logs. Instead, models emit their per-step counters into a sink, once per
+step, and the sink decides what to do with them:
+    - RingBufferSink keeps the most recent records in memory.
+    - BatchedFileSink appends records to a CSV file, a batch at a time.
+    - ConsoleSummarySink prints the latest counters at most every few seconds.
+
+Emitting a record only costs appending a small dict to a buffer.
+"""
+
+import collections
+import sys
+import time
+
+
+class MetricsSink:
+    """
+    Base class for metrics sinks.
+
+    Models call emit() once per step, and flush() when a run ends.
+    """
+
+    def emit(self, step, counters):
+        """Record the counters of a step.
+
+        Args:
+            step: The model's step (or time) the counters were taken at.
+            counters: Dictionary of counter names to values.
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """Write out anything buffered."""
+
+    def close(self):
+        """Flush, and release any resources held by the sink."""
+        self.flush()
+
+
+class RingBufferSink(MetricsSink):
+    """
+    Keeps the last capacity records in memory, as (step, counters) tuples.
+    """
+
+    def __init__(self, capacity=1000):
+        self.records = collections.deque(maxlen=capacity)
+
+    def emit(self, step, counters):
+        self.records.append((step, counters))
+
+
+class BatchedFileSink(MetricsSink):
+    """
+    Writes records to a CSV file, batch_size records at a time.
+
+    The columns are "step" followed by the counter names of the first record.
+    """
+
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        self.columns = None
+        self.buffer = []
+        self.file = open(path, "w")
+
+    def emit(self, step, counters):
+        if self.columns is None:
+            self.columns = list(counters)
+            self.file.write(",".join(["step"] + self.columns) + "\n")
+        self.buffer.append((step, counters))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        lines = [
+            ",".join([str(step)] + [str(counters[c]) for c in self.columns]) + "\n"
+            for step, counters in self.buffer
+        ]
+        self.file.writelines(lines)
+        self.file.flush()
+        self.buffer = []
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+
+class ConsoleSummarySink(MetricsSink):
+    """
+    Prints the latest record at most once every interval seconds, and on flush.
+    """
+
+    def __init__(self, interval=1.0, stream=None):
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stdout
+        self.last_print = -float("inf")
+        self.pending = None
+
+    def emit(self, step, counters):
+        self.pending = (step, counters)
+        now = time.monotonic()
+        if now - self.last_print >= self.interval:
+            self.last_print = now
+            self.flush()
+
+    def flush(self):
+        if self.pending is None:
+            return
+        step, counters = self.pending
+        summary = ", ".join(f"{name}: {value}" for name, value in counters.items())
+        self.stream.write(f"Step {step}: {summary}\n")
+        self.stream.flush()
+        self.pending = None
@@ -13,6 +13,7 @@ import mesa
 
 from wolf_sheep.scheduler import RandomActivationByTypeFiltered
 from wolf_sheep.agents import Sheep, Wolf, GrassPatch
+from wolf_sheep.metrics import ConsoleSummarySink
 
 
 class WolfSheep(mesa.Model):
@@ -53,6 +54,7 @@ class WolfSheep(mesa.Model):
         grass=False,
         grass_regrowth_time=30,
         sheep_gain_from_food=4,
+        metrics_sink=None,
     ):
         """
         Create a new Wolf-Sheep model with the given parameters.
@@ -67,6 +69,9 @@ class WolfSheep(mesa.Model):
             grass_regrowth_time: How long it takes for a grass patch to regrow
                                  once it is eaten
             sheep_gain_from_food: Energy sheep gain from grass, if enabled.
+            metrics_sink: MetricsSink to emit the counters of every step into.
+                          If None and verbose is set, a ConsoleSummarySink is
+                          used.
         """
         super().__init__()
         # Set parameters
@@ -80,6 +85,7 @@ class WolfSheep(mesa.Model):
         self.grass = grass
         self.grass_regrowth_time = grass_regrowth_time
         self.sheep_gain_from_food = sheep_gain_from_food
+        self.metrics_sink = metrics_sink
 
         self.schedule = RandomActivationByTypeFiltered(self)
         self.grid = mesa.space.MultiGrid(self.width, self.height, torus=True)
@@ -133,15 +139,18 @@ class WolfSheep(mesa.Model):
         self.schedule.step()
         # collect data
         self.datacollector.collect(self)
-        if self.verbose:
-            print(
-                [
-                    self.schedule.time,
-                    self.schedule.get_type_count(Wolf),
-                    self.schedule.get_type_count(Sheep),
-                    self.schedule.get_type_count(GrassPatch, lambda x: x.fully_grown),
-                ]
-            )
+        self.emit_metrics()
+
+    def emit_metrics(self):
+        """Emit the counters just collected by the datacollector into the sink."""
+        if self.metrics_sink is None:
+            if not self.verbose:
+                return
+            self.metrics_sink = ConsoleSummarySink()
+        counters = {
+            name: values[-1] for name, values in self.datacollector.model_vars.items()
+        }
+        self.metrics_sink.emit(self.schedule.time, counters)
 
     def run_model(self, step_count=200):
 
@@ -156,6 +165,9 @@ class WolfSheep(mesa.Model):
         for i in range(step_count):
             self.step()
 
+        if self.metrics_sink is not None:
+            self.metrics_sink.flush()
+
         if self.verbose:
             print("")
             print("Final number wolves: ", self.schedule.get_type_count(Wolf))